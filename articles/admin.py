@@ -1,15 +1,17 @@
 from django.contrib import admin
-from .models import Article, Comment, PostUserLikes
+from .models import Article, Comment, PostUserLikes, Tag
 
 
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "author",
-                    "created_at", "updated_at", "slug")
+                    "created_at", "updated_at", "slug", "likes_count",
+                    "comments_count")
     list_select_related = ("author",)
     search_fields = ("title", "content", "author__username", "slug")
     list_filter = ("created_at",)
-    readonly_fields = ("created_at", "updated_at", "slug")
+    readonly_fields = ("created_at", "updated_at", "slug", "likes_count",
+                       "comments_count")
 
 
 @admin.register(Comment)
@@ -26,3 +28,10 @@ class PostUserLikesAdmin(admin.ModelAdmin):
     list_select_related = ("user", "user__user", "article")
     search_fields = ("user__user__username", "article__title")
     list_filter = ("created_at",)
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "articles_count")
+    search_fields = ("name",)
+    readonly_fields = ("articles_count",)
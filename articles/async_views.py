@@ -0,0 +1,241 @@
+"""
+Async-native versions of the hottest read endpoints, for ASGI deployments:
+
+  GET /api/async/articles/            same shape and params as /api/articles/
+                                      (page, page_size, ordering, search, tag)
+  GET /api/async/articles/<id>/       same as /api/articles/<id>/
+  GET /api/async/comments/?article=   same as /api/comments/
+
+Under an ASGI server, authentication (JWT decoding plus the cached user
+lookup), serialization and rendering run on the event loop. Django's async
+ORM still executes every query through sync_to_async, one thread hop per
+call, so each endpoint instead makes exactly one hop per request for its
+throttle check and all of its queries.
+
+That hop is not thread-sensitive: it runs on the event loop's default
+thread pool, so concurrent requests query in parallel, each pool thread
+keeping its own persistent connection (DB_CONN_MAX_AGE). A worker can
+therefore hold up to that pool's size in connections. Thread-sensitive
+calls would get a new thread, and so a new connection, per request.
+
+Writes, keyset (?cursor=) paging,
+autocomplete and the anonymous response cache stay on the sync viewsets
+in views.py.
+"""
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.db import close_old_connections
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from users.auth import CachedJWTAuthentication, aget_request_profile_id
+
+from .conditional import (
+    make_etag, not_modified_response, query_fingerprint, set_validators,
+)
+from .filters import FullTextSearchFilter, TagFilter
+from .models import Article, Comment
+from .pagination import DefaultPagination
+from .serializers import ArticleSerializer, CommentSerializer, resolve_viewer_state
+from .views import ARTICLE_ORDERINGS, ArticleViewSet
+
+_renderer = JSONRenderer()
+_search = FullTextSearchFilter()
+_tags = TagFilter()
+
+
+def _json(data, status=200):
+    return HttpResponse(
+        _renderer.render(data), status=status, content_type="application/json")
+
+
+def async_read_endpoint(view):
+    """
+    GET/HEAD only; authenticates and throttles like the DRF views and
+    renders APIExceptions as DRF would.
+    """
+    @require_safe
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            await _authenticate(request)
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {"detail": detail}
+            response = _json(detail, exc.status_code)
+            if isinstance(exc, exceptions.AuthenticationFailed):
+                response["WWW-Authenticate"] = 'Bearer realm="api"'
+            if getattr(exc, "wait", None):
+                response["Retry-After"] = str(math.ceil(exc.wait))
+            return response
+    return wrapper
+
+
+async def _authenticate(request):
+    authenticator = CachedJWTAuthentication()
+    authenticator.stateless = settings.JWT_STATELESS_READS
+    result = await authenticator.aauthenticate(request)
+    request.user, request.auth = result or (AnonymousUser(), None)
+
+
+async def _in_db_thread(request, load, *args):
+    """
+    Run the request's throttle check and all of its queries in a single
+    hop to the sync thread; see the module docstring.
+    """
+    def run():
+        # What request_started/request_finished do for the request's own
+        # thread: drop expired or broken connections of this pool thread.
+        close_old_connections()
+        try:
+            _check_throttles(request)
+            return load(*args)
+        finally:
+            close_old_connections()
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
+def _check_throttles(request):
+    waits = [
+        throttle.wait()
+        for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES)
+        if not throttle.allow_request(request, None)
+    ]
+    if waits:
+        raise exceptions.Throttled(
+            max((w for w in waits if w is not None), default=None))
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET[DefaultPagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return DefaultPagination.page_size
+    if size < 1:
+        return DefaultPagination.page_size
+    return min(size, DefaultPagination.max_page_size)
+
+
+def _load_page(request, queryset):
+    """Evaluate one page like DefaultPagination; returns (page, rows)."""
+    paginator = DefaultPagination.django_paginator_class(
+        queryset, _page_size(request))
+    try:
+        page = paginator.page(request.GET.get("page", 1))
+    except InvalidPage:
+        raise exceptions.NotFound("Invalid page.")
+    return page, list(page.object_list)
+
+
+def _page_data(request, page, results):
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if page.has_next():
+        next_url = replace_query_param(url, "page", page.next_page_number())
+    if page.has_previous():
+        number = page.previous_page_number()
+        previous_url = (
+            remove_query_param(url, "page") if number == 1
+            else replace_query_param(url, "page", number)
+        )
+    return {
+        "count": page.paginator.count,
+        "count_is_approximate": page.paginator.is_approximate,
+        "next": next_url,
+        "previous": previous_url,
+        "results": results,
+    }
+
+
+@async_read_endpoint
+async def article_list(request):
+    if "cursor" in request.GET:
+        raise exceptions.ValidationError(
+            {"cursor": ["Keyset pagination is served by /api/articles/."]})
+    ordering = request.GET.get("ordering")
+    qs = Article.objects.defer("search_vector").prefetch_related("tags").order_by(
+        ordering if ordering in ARTICLE_ORDERINGS else "-created_at")
+    qs = _search.filter_queryset(Request(request), qs, ArticleViewSet)
+    profile_id = await aget_request_profile_id(request)
+
+    def load():
+        # TagFilter resolves tag names with a query of its own
+        filtered = _tags.filter_queryset(Request(request), qs, ArticleViewSet)
+        page, articles = _load_page(request, filtered)
+        return page, articles, resolve_viewer_state(profile_id, articles)
+
+    page, articles, state = await _in_db_thread(request, load)
+    results = ArticleSerializer(
+        articles, many=True, context={"viewer_state": state}).data
+    return _json(_page_data(request, page, results))
+
+
+@async_read_endpoint
+async def article_detail(request, pk):
+    profile_id = await aget_request_profile_id(request)
+
+    def load():
+        article = (Article.objects.defer("search_vector")
+                   .prefetch_related("tags").filter(pk=pk).first())
+        if article is None:
+            raise exceptions.NotFound("No Article matches the given query.")
+        return article, resolve_viewer_state(profile_id, article)
+
+    article, state = await _in_db_thread(request, load)
+    data = ArticleSerializer(article, context={"viewer_state": state}).data
+    etag = make_etag(data["id"], data["updated_at"], data["likes_count"],
+                     data["comments_count"], data["user_liked"])
+    last_modified = parse_datetime(data["updated_at"])
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    return set_validators(_json(data), etag, last_modified,
+                          vary=["Authorization"])
+
+
+@async_read_endpoint
+async def comment_list(request):
+    qs = Comment.objects.order_by("-created_at")
+    article_id = request.GET.get("article")
+    if not article_id:
+        page, comments = await _in_db_thread(request, _load_page, request, qs)
+        results = CommentSerializer(comments, many=True).data
+        return _json(_page_data(request, page, results))
+    if not article_id.isdigit():
+        raise exceptions.ValidationError(
+            {"article": ["A valid integer is required."]})
+
+    qs = qs.filter(article_id=article_id)
+    fingerprint = query_fingerprint(Request(request))
+
+    def load():
+        state = qs.aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+        etag = make_etag(article_id, fingerprint,
+                         state["count"], state["last_modified"])
+        not_modified = not_modified_response(
+            request, etag, state["last_modified"])
+        loaded = None if not_modified else _load_page(request, qs)
+        return etag, state["last_modified"], not_modified, loaded
+
+    etag, last_modified, not_modified, loaded = await _in_db_thread(
+        request, load)
+    if not_modified is not None:
+        return not_modified
+    page, comments = loaded
+    results = CommentSerializer(comments, many=True).data
+    return set_validators(
+        _json(_page_data(request, page, results)), etag, last_modified)
@@ -0,0 +1,82 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Lookup, Q, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blogapi.lru import LRUCache
+
+from .models import Article
+
+MAX_QUERY_LENGTH = 64
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# recent suggestions; cleared on local article writes
+suggestion_cache = LRUCache()
+
+
+class ILike(Lookup):
+    """
+    `lhs ILIKE rhs` (PostgreSQL). Unlike istartswith, which compiles to
+    UPPER(title) LIKE UPPER(...), the bare column can be served by the
+    gin_trgm_ops index from migration 0008.
+    """
+    lookup_name = "ilike"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", [*lhs_params, *rhs_params]
+
+
+def prefix_pattern(q):
+    """LIKE pattern matching titles that start with `q` literally."""
+    for char in ("\\", "%", "_"):
+        q = q.replace(char, "\\" + char)
+    return q + "%"
+
+
+def normalize_query(q):
+    return " ".join((q or "").split())[:MAX_QUERY_LENGTH].lower()
+
+
+def suggest_titles(q, limit=DEFAULT_LIMIT, using="default"):
+    """
+    Return up to `limit` {id, slug, title} dicts whose title starts with `q`
+    or (on PostgreSQL) fuzzily matches it, best trigram word similarity
+    first. Both PostgreSQL predicates are served by the pg_trgm GIN index
+    on title (a BitmapOr of two index scans).
+    """
+    q = normalize_query(q)
+    if not q:
+        return []
+    key = (using, q, limit)
+    cached = suggestion_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = list(suggestion_queryset(q, using)[:limit])
+    suggestion_cache.set(key, rows)
+    return rows
+
+
+def suggestion_queryset(q, using="default"):
+    """{id, slug, title} rows matching the normalized `q`, best first."""
+    qs = Article.objects.using(using)
+    if connections[using].vendor == "postgresql":
+        qs = (
+            qs.filter(ILike(F("title"), Value(prefix_pattern(q)))
+                      | Q(title__trigram_word_similar=q))
+            .annotate(similarity=TrigramWordSimilarity(q, "title"))
+            .order_by("-similarity", "title")
+        )
+    else:
+        qs = qs.filter(title__istartswith=q).order_by("title")
+    return qs.values("id", "slug", "title")
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def clear_suggestion_cache(sender, **kwargs):
+    suggestion_cache.clear()
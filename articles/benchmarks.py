@@ -0,0 +1,218 @@
+"""
+Endpoint benchmark suite with query-count and latency budgets.
+
+Every scenario is a request to a router endpoint, sent in-process through
+Django's test Client with the full middleware stack. After a few warm-up
+requests, each scenario records p50/p95/p99 latency and the highest SQL
+query count per request. Caches are left in the steady state they reach
+in production.
+
+Budgets live in benchmark_baseline.json, one section per database vendor:
+
+  {"postgresql": {"article-list": {"queries": 3, "p50_ms": ..., ...}}}
+
+A scenario fails if it makes more queries than its budget, if its p95
+exceeds the baseline p95 by more than `tolerance`, or if it does not
+answer 2xx; scenarios without a budget are only reported. Latency depends on the machine and dataset, so tests check
+queries only; `manage.py benchmark_endpoints` checks both and can
+rewrite the baseline.
+"""
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from users.auth import ProfileTokenObtainPairSerializer
+
+from .models import Article, Comment
+from .views import ARTICLE_ORDERINGS
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+DEFAULT_REPEAT = 30
+DEFAULT_WARMUP = 3
+DEFAULT_TOLERANCE = 0.5
+
+
+class Scenario:
+    def __init__(self, name, path, method="get", data=None, auth=True):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.auth = auth
+
+
+def build_scenarios(user, password, article_id, comment_id=None):
+    """
+    Scenarios for `user` (authenticated) around the article `article_id`;
+    the replies scenario needs a comment `comment_id` on it.
+    """
+    scenarios = [Scenario("article-list-anonymous", "/api/articles/", auth=False)]
+    scenarios += [
+        Scenario("article-list-" + ordering.lstrip("-")
+                 + ("-desc" if ordering.startswith("-") else ""),
+                 f"/api/articles/?ordering={ordering}")
+        for ordering in sorted(ARTICLE_ORDERINGS)
+    ]
+    scenarios += [
+        Scenario("article-list-search", "/api/articles/?search=django"),
+        Scenario("article-autocomplete", "/api/articles/autocomplete/?q=dat"),
+        Scenario("article-detail", f"/api/articles/{article_id}/"),
+        Scenario("article-detail-comments",
+                 f"/api/articles/{article_id}/?include=comments"),
+        Scenario("comment-list", f"/api/comments/?article={article_id}"),
+        Scenario("comment-thread", f"/api/comments/thread/?article={article_id}"),
+        Scenario("post-user-likes-mine", "/api/post-user-likes/?mine=1"),
+        Scenario("post-user-likes-liked-ids", "/api/post-user-likes/liked-ids/"),
+        Scenario("auth-me", "/api/auth/me/"),
+        Scenario("userprofile-mine", "/api/user-profiles/?mine=1"),
+        Scenario("token-obtain", "/token/", method="post", auth=False,
+                 data={"username": user.username, "password": password}),
+    ]
+    if comment_id is not None:
+        scenarios.append(
+            Scenario("comment-replies", f"/api/comments/{comment_id}/replies/"))
+    return scenarios
+
+
+def benchmark_article():
+    """The most liked article: the detail/comments scenarios' subject."""
+    return Article.objects.order_by("-likes_count", "pk").values_list(
+        "pk", flat=True).first()
+
+
+def benchmark_comment(article_id):
+    """The article's top-level comment with the most direct replies."""
+    return (Comment.objects.filter(article_id=article_id, parent__isnull=True)
+            .annotate(n=Count("replies")).order_by("-n", "pk")
+            .values_list("pk", flat=True).first())
+
+
+def run_benchmarks(user, password, repeat=DEFAULT_REPEAT,
+                   warmup=DEFAULT_WARMUP, only=None, scenarios=None):
+    """
+    Run every scenario (or those whose name starts with one of `only`) as
+    `user`; `scenarios` defaults to build_scenarios() around
+    benchmark_article(). Returns {name: {"queries", "p50_ms", "p95_ms",
+    "p99_ms", "statuses"}}.
+    """
+    client = Client()
+    token = str(ProfileTokenObtainPairSerializer.get_token(user).access_token)
+    if scenarios is None:
+        article_id = benchmark_article()
+        scenarios = build_scenarios(
+            user, password, article_id, benchmark_comment(article_id))
+    results = {}
+    for scenario in scenarios:
+        if only and not scenario.name.startswith(tuple(only)):
+            continue
+        headers = {"Authorization": f"Bearer {token}"} if scenario.auth else {}
+        latencies, queries, statuses = [], [], {}
+        for i in range(warmup + repeat):
+            _reset_throttles(user)
+            elapsed, count, status = _measure(client, scenario, headers)
+            if i >= warmup:
+                latencies.append(elapsed)
+                queries.append(count)
+                statuses[status] = statuses.get(status, 0) + 1
+        results[scenario.name] = _summarize(latencies, queries, statuses)
+    return results
+
+
+def _measure(client, scenario, headers):
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    send = getattr(client, scenario.method)
+    kwargs = {"content_type": "application/json"} if scenario.data else {}
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(counter))
+        start = time.perf_counter()
+        response = send(scenario.path, scenario.data, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - start
+    return elapsed * 1000, count, response.status_code
+
+
+def _reset_throttles(user):
+    # Measure the endpoints, not DRF's rate limits.
+    cache.delete_many([
+        UserRateThrottle.cache_format % {"scope": "user", "ident": user.pk},
+        AnonRateThrottle.cache_format % {"scope": "anon", "ident": "127.0.0.1"},
+    ])
+
+
+def _summarize(latencies, queries, statuses):
+    if len(latencies) > 1:
+        q = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {
+        "queries": max(queries),
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "statuses": statuses,
+    }
+
+
+def load_baseline(path=BASELINE_PATH, vendor=None):
+    """The budgets for `vendor` (default: the default connection's)."""
+    vendor = vendor or connection.vendor
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh).get(vendor, {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH, vendor=None):
+    """Store `results` as budgets for `vendor`; other entries are kept."""
+    vendor = vendor or connection.vendor
+    try:
+        with open(path, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    except FileNotFoundError:
+        baseline = {}
+    baseline.setdefault(vendor, {}).update(
+        (name, {k: v for k, v in result.items() if k != "statuses"})
+        for name, result in results.items()
+    )
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(baseline, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def check_budgets(results, baseline, tolerance=DEFAULT_TOLERANCE,
+                  latency=True):
+    """Human-readable budget violations of `results` against `baseline`."""
+    violations = []
+    for name, result in results.items():
+        failed = {s: n for s, n in result["statuses"].items()
+                  if not 200 <= s < 300}
+        if failed:
+            violations.append(f"{name}: non-2xx responses {failed}")
+        budget = baseline.get(name)
+        if budget is None:
+            continue  # new scenario: record it with --update-baseline
+        if result["queries"] > budget["queries"]:
+            violations.append(
+                f"{name}: {result['queries']} queries, budget {budget['queries']}")
+        limit = budget["p95_ms"] * (1 + tolerance)
+        if latency and result["p95_ms"] > limit:
+            violations.append(
+                f"{name}: p95 {result['p95_ms']:.2f}ms, budget {limit:.2f}ms "
+                f"({budget['p95_ms']:.2f}ms + {tolerance:.0%})")
+    return violations
@@ -0,0 +1,114 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from blogapi.db_routing import primary_reads
+
+CONTENT_VERSION_KEY = "articles:content-version"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_content_version():
+    # Seed with a timestamp so an evicted counter never reuses old versions.
+    version = _cache().get(CONTENT_VERSION_KEY)
+    if version is None:
+        _cache().add(CONTENT_VERSION_KEY, time.time_ns())
+        version = _cache().get(CONTENT_VERSION_KEY)
+    return version
+
+
+def bump_content_version():
+    """
+    Invalidate every cached article/comment response at once, when the
+    current transaction commits (right away outside one). Bumping before
+    the commit would let a concurrent reader cache the old rows under the
+    new version.
+    """
+    transaction.on_commit(_bump_content_version)
+
+
+def _bump_content_version():
+    try:
+        _cache().incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        _cache().add(CONTENT_VERSION_KEY, time.time_ns())
+
+
+def response_cache_stats():
+    with _stats_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def response_cache_key(view, request, kwargs):
+    params = urlencode(sorted(
+        (k, v) for k, values in request.query_params.lists() for v in values
+    ))
+    raw = "|".join([
+        request.get_host(),
+        view.basename or "",
+        view.action or "",
+        urlencode(sorted(kwargs.items())),
+        params,
+    ])
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"articles:resp:{get_content_version()}:{digest}"
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Cache successful anonymous GET responses of `response_cache_actions`,
+    keyed on the normalized query string and the global content version.
+    Any article, comment or like write bumps the version once it commits
+    (see models.py), so stale entries are simply never read again and age
+    out. The cache must be shared by all workers (see blogapi.checks).
+    Misses are read from the primary: a lagging replica could otherwise
+    put pre-write rows in the cache under the new version.
+    """
+    response_cache_actions = ("list", "retrieve")
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if (
+            self.action not in self.response_cache_actions
+            or request.user.is_authenticated
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = response_cache_key(self, request, kwargs)
+        data = _cache().get(key)
+        if data is not None:
+            _record("hits")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _record("misses")
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            _cache().set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,51 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.fields import DateTimeField
+
+_datetime_field = DateTimeField()
+
+
+def make_etag(*parts):
+    """Strong ETag over the given parts (datetimes in API representation)."""
+    normalized = [
+        _datetime_field.to_representation(p) if hasattr(p, "tzinfo") else p
+        for p in parts
+    ]
+    raw = "|".join("" if p is None else str(p) for p in normalized)
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+def query_fingerprint(request):
+    return urlencode(sorted(
+        (k, v) for k, values in request.query_params.lists() for v in values
+    ))
+
+
+def has_preconditions(request):
+    return (
+        "HTTP_IF_NONE_MATCH" in request.META
+        or "HTTP_IF_MODIFIED_SINCE" in request.META
+    )
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """304 (or 412) response if the client's validators match, else None."""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified=None, vary=()):
+    if response.status_code != 200:
+        return response
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models.functions import Coalesce
+
+# Fallback cached row counts expire after this many seconds even if no
+# create/delete signal fires (bulk writes and cascades bypass signals).
+ROW_COUNT_CACHE_TTL = 60
+
+
+def _row_count_key(model):
+    return f"rowcount:{model._meta.db_table}"
+
+
+def _planner_row_estimate(queryset):
+    """pg_class.reltuples for the queryset's table; None before ANALYZE."""
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def row_count_estimate(queryset):
+    """
+    (rows, exact): a cheap estimate of the number of rows in the queryset's
+    table, cached for ROW_COUNT_CACHE_TTL seconds and dropped on
+    create/delete.
+    PostgreSQL: planner statistics from pg_class.reltuples.
+    Elsewhere (or before the first ANALYZE): an exact count; `exact` is
+    true only when that count was just taken rather than read from the
+    cache.
+    """
+    model = queryset.model
+    key = _row_count_key(model)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows, False
+    rows = None
+    if connections[queryset.db].vendor == "postgresql":
+        rows = _planner_row_estimate(queryset)
+    exact = rows is None
+    if exact:
+        rows = model._base_manager.using(queryset.db).count()
+    cache.set(key, rows, ROW_COUNT_CACHE_TTL)
+    return rows, exact
+
+
+def invalidate_row_count(model):
+    # after commit, or a concurrent count could re-cache the old total
+    key = _row_count_key(model)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def related_count(model, field):
+    """
+    Expression counting the `model` rows whose `field` points at the outer
+    row; 0 when there are none.
+    """
+    counts = (
+        model._default_manager.filter(**{field: models.OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(c=models.Count("pk"))
+        .values("c")
+    )
+    return Coalesce(
+        models.Subquery(counts, output_field=models.IntegerField()), 0)
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Exists, F, OuterRef
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from .models import ArticleTag, Tag
+from .tagging import MAX_TAGS_PER_FILTER, normalize_names
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by Article.search_vector on PostgreSQL: a GIN index
+    lookup with websearch syntax ("quoted phrases", -exclusions, or) and
+    ts_rank relevance. Results are ordered by relevance unless the client
+    asked for an explicit ?ordering= or keyset (?cursor=) pagination.
+
+    Other database backends fall back to SearchFilter over search_fields.
+    """
+    vector_field = "search_vector"
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        terms = request.query_params.get(self.search_param, "").strip()
+        if not terms:
+            return queryset
+
+        query = SearchQuery(
+            terms,
+            search_type="websearch",
+            config=settings.ARTICLE_SEARCH_CONFIG,
+        )
+        queryset = queryset.filter(**{self.vector_field: query})
+        if "ordering" in request.query_params or "cursor" in request.query_params:
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(F(self.vector_field), query),
+        ).order_by("-search_rank", "-created_at")
+
+
+class TagFilter(filters.BaseFilterBackend):
+    """
+    ?tag=a,b (or ?tag=a&tag=b): articles carrying any of the tags; with
+    ?tag_match=all, only those carrying every one.
+
+    Names are resolved to ids first (one query on the unique name index),
+    so the article query only probes the join table's indexes: "any" is a
+    semi-join on (tag, article); "all" lets the rarest tag (by
+    Tag.articles_count) drive it and checks the others per article on the
+    (article, tag) unique index. An unknown tag short-circuits "all" to an
+    empty result without touching articles.
+    """
+    tag_param = "tag"
+    match_param = "tag_match"
+
+    def filter_queryset(self, request, queryset, view):
+        names = normalize_names(
+            name for value in request.query_params.getlist(self.tag_param)
+            for name in value.split(","))
+        if not names:
+            return queryset
+        if len(names) > MAX_TAGS_PER_FILTER:
+            raise ValidationError(
+                {self.tag_param: [f"At most {MAX_TAGS_PER_FILTER} tags."]})
+        match = request.query_params.get(self.match_param, "any")
+        if match not in ("any", "all"):
+            raise ValidationError({self.match_param: ['Expected "any" or "all".']})
+
+        tag_ids = [pk for pk, _ in sorted(
+            Tag.objects.filter(name__in=names).values_list("pk", "articles_count"),
+            key=lambda row: row[1])]
+        if not tag_ids or (match == "all" and len(tag_ids) < len(names)):
+            return queryset.none()
+        if match == "any":
+            return queryset.filter(pk__in=ArticleTag.objects.filter(
+                tag_id__in=tag_ids).values("article_id"))
+
+        rarest, *others = tag_ids
+        queryset = queryset.filter(pk__in=ArticleTag.objects.filter(
+            tag_id=rarest).values("article_id"))
+        for tag_id in others:
+            queryset = queryset.filter(Exists(ArticleTag.objects.filter(
+                article_id=OuterRef("pk"), tag_id=tag_id)))
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.tag_param,
+                "required": False,
+                "in": "query",
+                "description": "Comma-separated tag names.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.match_param,
+                "required": False,
+                "in": "query",
+                "description": 'Match "any" (default) or "all" of the tags.',
+                "schema": {"type": "string", "enum": ["any", "all"]},
+            },
+        ]
@@ -0,0 +1,168 @@
+import json
+import time
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .autocomplete import suggestion_cache
+from .caching import bump_content_version
+from .counts import invalidate_row_count
+from .models import SLUG_ALLOCATION_ATTEMPTS, Article, ArticleTag, Tag
+from .serializers import ArticleImportSerializer
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# Bound on remembered {slug base: last suffix} entries across batches.
+MAX_KNOWN_SLUG_BASES = 50_000
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line_no, errors):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def import_articles(lines, author, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Import articles from an iterable of JSON lines (str or bytes), each an
+    ArticleSerializer payload ({"title": ..., "content": ..., "tags": [ids]}),
+    attributed to `author`.
+
+    Lines are consumed lazily `batch_size` at a time: each batch is validated,
+    slugged (one query per title base not seen earlier in the import) and
+    inserted with a single bulk_create in its own transaction (plus one for
+    the batch's tag rows, whose ids are checked with one query), so memory
+    stays flat regardless of input size. Invalid lines are counted and reported, never inserted.
+    `progress(result)` is called after every batch.
+    """
+    result = ImportResult()
+    # One serializer reused for every row: building fields per row costs
+    # more than the validation itself.
+    validator = ArticleImportSerializer()
+    known_suffixes = {}
+    numbered = enumerate(lines, start=1)
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            break
+        rows = []
+        for line_no, line in chunk:
+            row = _parse_line(line_no, line, author, validator, result)
+            if row is not None:
+                rows.append((line_no, *row))
+        batch = _check_tags(rows, result)
+        if batch:
+            if len(known_suffixes) > MAX_KNOWN_SLUG_BASES:
+                known_suffixes.clear()
+            _insert_batch(batch, known_suffixes)
+            result.imported += len(batch)
+        result.elapsed = time.perf_counter() - result.started
+        if progress is not None:
+            progress(result)
+
+    if result.imported:
+        # bulk_create bypasses the post_save receivers in models.py
+        invalidate_row_count(Article)
+        bump_content_version()
+        suggestion_cache.clear()
+    result.elapsed = time.perf_counter() - result.started
+    return result
+
+
+def _parse_line(line_no, line, author, validator, result):
+    if isinstance(line, bytes):
+        try:
+            line = line.decode("utf-8")
+        except UnicodeDecodeError:
+            result.reject(line_no, {"non_field_errors": ["Invalid UTF-8."]})
+            return None
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        result.reject(line_no, {"non_field_errors": ["Invalid JSON."]})
+        return None
+    if not isinstance(payload, dict):
+        result.reject(line_no, {"non_field_errors": ["Expected a JSON object."]})
+        return None
+
+    try:
+        data = validator.run_validation(payload)
+    except ValidationError as exc:
+        result.reject(line_no, exc.detail)
+        return None
+    tag_ids = list(dict.fromkeys(data.pop("tags", ())))
+    return Article(author=author, **data), tag_ids
+
+
+def _check_tags(rows, result):
+    """
+    (article, tag ids) for the parsed `rows` whose tags all exist, looked up
+    with one query per batch; the rest are rejected.
+    """
+    wanted = {tag_id for _, _, tag_ids in rows for tag_id in tag_ids}
+    known = set(Tag.objects.filter(
+        pk__in=wanted).values_list("pk", flat=True)) if wanted else set()
+    batch = []
+    for line_no, article, tag_ids in rows:
+        unknown = [tag_id for tag_id in tag_ids if tag_id not in known]
+        if unknown:
+            result.reject(line_no, {"tags": [
+                f'Invalid pk "{tag_id}" - object does not exist.'
+                for tag_id in unknown]})
+        else:
+            batch.append((article, tag_ids))
+    return batch
+
+
+def _insert_batch(batch, known_suffixes):
+    articles = [article for article, _ in batch]
+    for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                Article.objects.allocate_slugs(articles, known_suffixes)
+                created = Article.objects.bulk_create(articles)
+                Article.objects.filter(
+                    pk__in=[a.pk for a in created]).update_search_vector()
+                # bulk_create cannot set m2m rows (or fire m2m_changed)
+                tag_rows = [
+                    ArticleTag(article_id=article.pk, tag_id=tag_id)
+                    for article, tag_ids in batch for tag_id in tag_ids
+                ]
+                if tag_rows:
+                    ArticleTag.objects.bulk_create(tag_rows, batch_size=1000)
+                    Tag.objects.filter(pk__in={
+                        row.tag_id for row in tag_rows}).refresh_articles_count()
+            return
+        except IntegrityError as exc:
+            # A concurrent writer took one of our slugs; reallocate.
+            if "slug" not in str(exc) or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                raise
+            known_suffixes.clear()
+            for article in articles:
+                article.slug = ""
+                article.pk = None
@@ -0,0 +1,113 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a running server with --clients concurrent keep-alive "
+        "clients and report throughput and latency percentiles. Run it "
+        "against a WSGI server (e.g. gunicorn on /api/articles/) and an ASGI "
+        "server (e.g. uvicorn on /api/async/articles/) to compare. DRF "
+        "throttling answers 429 past its rate, so benchmark with throttling "
+        "disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--clients", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=20,
+                            help="Requests per client.")
+        parser.add_argument("--header", action="append", default=[],
+                            help='Extra header, e.g. "Authorization: Bearer …".')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        target = (
+            url.hostname, url.port or 80,
+            (url.path or "/") + (f"?{url.query}" if url.query else ""),
+        )
+        stats = asyncio.run(self._run(
+            target, options["clients"], options["requests"], options["header"]))
+        self._report(stats, options["clients"])
+
+    async def _run(self, target, clients, per_client, headers):
+        stats = {"latencies": [], "statuses": {}, "errors": 0}
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            self._client(target, per_client, headers, stats)
+            for _ in range(clients)
+        ))
+        stats["elapsed"] = time.perf_counter() - start
+        return stats
+
+    async def _client(self, target, count, headers, stats):
+        host, port, path = target
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            + "".join(f"{h}\r\n" for h in headers)
+            + "\r\n"
+        ).encode("latin-1")
+        reader = writer = None
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                status, keep_alive = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                stats["errors"] += 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+            stats["latencies"].append(time.perf_counter() - started)
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    def _report(self, stats, clients):
+        latencies = sorted(stats["latencies"])
+        done = len(latencies)
+        self.stdout.write(
+            f"{clients} clients, {done} responses, {stats['errors']} errors "
+            f"in {stats['elapsed']:.2f}s: {done / stats['elapsed']:.0f} req/s")
+        self.stdout.write(f"status codes: {dict(sorted(stats['statuses'].items()))}")
+        if done:
+            q = statistics.quantiles(latencies, n=100) if done > 1 else latencies * 99
+            self.stdout.write(
+                f"latency ms: p50 {q[49] * 1000:.1f}  p90 {q[89] * 1000:.1f}  "
+                f"p99 {q[98] * 1000:.1f}  max {latencies[-1] * 1000:.1f}")
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response; return (status, keep_alive)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection", "").lower() != "close"
@@ -0,0 +1,110 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from articles.benchmarks import (
+    BASELINE_PATH, DEFAULT_REPEAT, DEFAULT_TOLERANCE, DEFAULT_WARMUP,
+    check_budgets, load_baseline, run_benchmarks, save_baseline,
+)
+from articles.synthetic import generate_dataset
+
+DATASET_PREFIX = "bench"
+DATASET_PASSWORD = "synthetic"
+# --seed-dataset only runs against databases whose name contains one of these.
+SCRATCH_DATABASE_MARKERS = ("test", "bench")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every router endpoint in-process (latency percentiles and "
+        "SQL query counts) and compare with the stored baseline; exits "
+        "non-zero when a query or latency budget is exceeded. Needs the "
+        "synthetic dataset (users bench-<n>); --seed-dataset creates it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+        parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+        parser.add_argument(
+            "--only", nargs="+",
+            help="Run only scenarios whose name starts with one of these.")
+        parser.add_argument("--baseline", default=str(BASELINE_PATH))
+        parser.add_argument(
+            "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+            help="Allowed p95 slowdown over the baseline (0.5 = +50%%).")
+        parser.add_argument(
+            "--update-baseline", action="store_true",
+            help="Write the measured numbers as the new budgets.")
+        parser.add_argument(
+            "--seed-dataset", action="store_true",
+            help="Create the dataset if it is missing. Its users share a "
+                 "known password, so this needs DEBUG and a database whose "
+                 "name contains 'test' or 'bench'.")
+        parser.add_argument(
+            "--articles", type=int, default=10_000,
+            help="Dataset size when seeding (users, comments and likes scale "
+                 "with it).")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be >= 1.")
+        user = User.objects.filter(username=f"{DATASET_PREFIX}-0").first()
+        if user is None:
+            if not options["seed_dataset"]:
+                raise CommandError(
+                    f"No {DATASET_PREFIX}-<n> dataset in this database; "
+                    "rerun with --seed-dataset to create one.")
+            self.check_seeding_allowed()
+            articles = options["articles"]
+            self.stdout.write(f"Seeding a {articles}-article dataset...")
+            generate_dataset(
+                max(1, articles // 10), articles, articles * 5, articles * 5,
+                prefix=DATASET_PREFIX, password=DATASET_PASSWORD,
+                reply_ratio=0.5)
+            user = User.objects.get(username=f"{DATASET_PREFIX}-0")
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            results = run_benchmarks(
+                user, DATASET_PASSWORD, repeat=options["repeat"],
+                warmup=options["warmup"], only=options["only"])
+
+        baseline = load_baseline(options["baseline"])
+        self.stdout.write(
+            f"{'scenario':34} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8}  budget")
+        for name, result in results.items():
+            budget = baseline.get(name)
+            budget_text = (
+                f"{budget['queries']}q / p95 {budget['p95_ms']:.2f}ms"
+                if budget else "-")
+            self.stdout.write(
+                f"{name:34} {result['queries']:7} {result['p50_ms']:8.2f} "
+                f"{result['p95_ms']:8.2f} {result['p99_ms']:8.2f}  {budget_text}")
+
+        if options["update_baseline"]:
+            save_baseline(results, options["baseline"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline for {connection.vendor} written to {options['baseline']}."))
+            return
+
+        violations = check_budgets(results, baseline, options["tolerance"])
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f"{len(violations)} budget(s) exceeded.")
+        self.stdout.write(self.style.SUCCESS("All budgets met."))
+
+    def check_seeding_allowed(self):
+        if not settings.DEBUG:
+            raise CommandError(
+                "Refusing to seed with DEBUG off: the dataset's users have a "
+                "known password.")
+        name = os.path.basename(str(connection.settings_dict["NAME"])).lower()
+        if not any(marker in name for marker in SCRATCH_DATABASE_MARKERS):
+            raise CommandError(
+                f"Refusing to seed database {name!r}: its name does not "
+                f"contain any of {', '.join(SCRATCH_DATABASE_MARKERS)}.")
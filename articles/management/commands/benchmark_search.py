@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Q
+
+from articles.models import Article
+
+WORDS = (
+    "django python postgres index query cache latency throughput vector "
+    "search rank article comment like author draft release weekly update "
+    "performance database replica cursor page token profile tag thread"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy ILIKE search against the PostgreSQL full-text "
+        "search_vector path (first page + count, as the article list does)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--terms", nargs="+",
+                            default=["django", "postgres cache", "weekly"])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Bulk-create this many synthetic articles first "
+                 "(e.g. 1000000 for the reference dataset).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Full-text search benchmark requires PostgreSQL.")
+
+        if options["seed"]:
+            self._seed(options["seed"], options["batch_size"])
+
+        config = settings.ARTICLE_SEARCH_CONFIG
+        total = Article.objects.count()
+        self.stdout.write(f"{total} articles, {options['repeat']} runs per term")
+
+        for term in options["terms"]:
+            legacy = (
+                Article.objects.filter(
+                    Q(title__icontains=term) | Q(content__icontains=term))
+                .order_by("-created_at")
+            )
+            query = SearchQuery(term, search_type="websearch", config=config)
+            fts = (
+                Article.objects.filter(search_vector=query)
+                .annotate(search_rank=SearchRank(F("search_vector"), query))
+                .order_by("-search_rank", "-created_at")
+            )
+            for label, qs in (("ilike", legacy), ("fts", fts)):
+                p50, p95 = self._time(qs, options["repeat"])
+                self.stdout.write(
+                    f"{term!r:20} {label:6} p50={p50:8.2f}ms p95={p95:8.2f}ms")
+
+    def _time(self, qs, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(qs[:10])
+            qs.count()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+    def _seed(self, count, batch_size):
+        author, _ = User.objects.get_or_create(username="bench-search")
+        rng = random.Random(42)
+        offset = Article.objects.filter(author=author).count()
+        created = 0
+        while created < count:
+            n = min(batch_size, count - created)
+            batch = []
+            for i in range(offset + created, offset + created + n):
+                title = " ".join(rng.choices(WORDS, k=rng.randint(3, 8)))
+                body = " ".join(rng.choices(WORDS, k=rng.randint(50, 800)))
+                batch.append(Article(
+                    author=author, title=title, content=body,
+                    slug=f"bench-search-{i}"))
+            Article.objects.bulk_create(batch, batch_size=batch_size)
+            created += n
+            self.stdout.write(f"seeded {created}/{count}")
+        Article.objects.filter(
+            author=author, search_vector__isnull=True).update_search_vector()
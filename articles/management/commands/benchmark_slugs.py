@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from articles.models import Article, slug_base
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the old per-candidate exists() slug loop with the "
+        "single-query allocator on thousands of same-titled articles. "
+        "All rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5000)
+        parser.add_argument("--title", default="Weekly update")
+
+    def handle(self, *args, **options):
+        count, title = options["count"], options["title"]
+        try:
+            with transaction.atomic():
+                self._run(count, title)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, count, title):
+        author, _ = User.objects.get_or_create(username="bench-slugs")
+
+        start = time.perf_counter()
+        articles = [
+            Article(author=author, title=title, content="")
+            for _ in range(count)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            Article.objects.allocate_slugs(articles)
+        Article.objects.bulk_create(articles, batch_size=1000)
+        self.stdout.write(
+            f"bulk allocate+insert {count}: "
+            f"{(time.perf_counter() - start) * 1000:.1f}ms, "
+            f"{len(ctx.captured_queries)} allocation query(ies)")
+
+        base = slug_base(title)
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            candidate, i = base, 2
+            while Article.objects.filter(slug=candidate).exists():
+                candidate = f"{base}-{i}"
+                i += 1
+            legacy_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"legacy next slug ({candidate}): {legacy_ms:.1f}ms, "
+            f"{len(ctx.captured_queries)} queries")
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            slug = Article(title=title)._build_unique_slug()
+            new_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"single-query next slug ({slug}): {new_ms:.1f}ms, "
+            f"{len(ctx.captured_queries)} queries")
@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+from django.db.models.functions import Length
+from django.test import override_settings
+
+from articles.benchmarks import (
+    DEFAULT_REPEAT, DEFAULT_WARMUP, Scenario, run_benchmarks,
+)
+from articles.models import PATH_SEGMENT_WIDTH, Article, Comment
+from articles.pagination import ThreadPagination
+from articles.synthetic import generate_dataset
+
+DATASET_PREFIX = "thread"
+DATASET_PASSWORD = "synthetic"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark threaded comments on one article with a large, deep "
+        "thread (seeded as user thread-0's article on first use): thread "
+        "pages, a whole subtree, and the same subtree loaded level by level "
+        "over parent ids for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comments", type=int, default=50_000)
+        parser.add_argument(
+            "--reply-ratio", type=float, default=0.8,
+            help="Share of replies when seeding; higher makes deeper threads.")
+        parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+        parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be >= 1.")
+        user = User.objects.filter(username=f"{DATASET_PREFIX}-0").first()
+        if user is None:
+            self.stdout.write(
+                f"Seeding an article with {options['comments']} comments...")
+            generate_dataset(
+                100, 1, options["comments"], prefix=DATASET_PREFIX,
+                password=DATASET_PASSWORD, reply_ratio=options["reply_ratio"])
+            user = User.objects.get(username=f"{DATASET_PREFIX}-0")
+        article = Article.objects.get(slug=f"{DATASET_PREFIX}-0")
+
+        thread = Comment.objects.filter(article=article)
+        shape = thread.aggregate(
+            comments=Count("pk"), longest=Max(Length("path")))
+        roots = list(thread.filter(parent__isnull=True)
+                     .order_by("path").values_list("path", flat=True))
+        deepest = thread.order_by(Length("path").desc(), "path").first()
+        if deepest is None:
+            raise CommandError(f"Article {article.slug} has no comments.")
+        root = Comment.objects.get(pk=int(deepest.path[:PATH_SEGMENT_WIDTH]))
+        subtree_size = Comment.objects.subtree(root).count()
+        self.stdout.write(
+            f"{shape['comments']} comments, {len(roots)} top-level, depth up "
+            f"to {shape['longest'] // PATH_SEGMENT_WIDTH - 1}; deepest thread "
+            f"under comment {root.pk} has {subtree_size} replies.")
+
+        middle = ThreadPagination().encode_cursor(roots[len(roots) // 2])
+        scenarios = [
+            Scenario("thread-first-page",
+                     f"/api/comments/thread/?article={article.pk}"),
+            Scenario("thread-middle-page",
+                     f"/api/comments/thread/?article={article.pk}&cursor={middle}"),
+            Scenario("replies-deepest-thread",
+                     f"/api/comments/{root.pk}/replies/?page_size=100"),
+        ]
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            results = run_benchmarks(
+                user, DATASET_PASSWORD, repeat=options["repeat"],
+                warmup=options["warmup"], scenarios=scenarios)
+
+        self.stdout.write(
+            f"{'scenario':34} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:34} {result['queries']:7} {result['p50_ms']:8.2f} "
+                f"{result['p95_ms']:8.2f} {result['p99_ms']:8.2f}")
+
+        range_ms, range_queries = self._time(
+            lambda: (list(Comment.objects.subtree(root)), 1), options["repeat"])
+        level_ms, level_queries = self._time(
+            lambda: _load_by_level(root), options["repeat"])
+        self.stdout.write(
+            f"Subtree of {subtree_size} rows: path range {range_ms:.2f} ms "
+            f"({range_queries} query), level by level {level_ms:.2f} ms "
+            f"({level_queries} queries).")
+
+    @staticmethod
+    def _time(load, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _, queries = load()
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)[len(timings) // 2], queries
+
+
+def _load_by_level(root):
+    """The subtree as a plain parent-FK design would load it."""
+    rows, level, queries = [], [root.pk], 0
+    while level:
+        children = list(Comment.objects.filter(parent_id__in=level))
+        queries += 1
+        rows += children
+        level = [c.pk for c in children]
+    return rows, queries
@@ -0,0 +1,39 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.exporting import EXPORTS, export_ndjson, parse_since
+
+
+class Command(BaseCommand):
+    help = "Stream articles, comments or likes as NDJSON (stdout or --output)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(EXPORTS))
+        parser.add_argument("--since", help="ISO date/datetime on created_at.")
+        parser.add_argument("--output", help="File path (default: stdout).")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = parse_since(options["since"])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        out = (open(options["output"], "w", encoding="utf-8")
+               if options["output"] else sys.stdout)
+        rows = 0
+        start = time.perf_counter()
+        try:
+            for chunk in export_ndjson(options["kind"], since):
+                out.write(chunk)
+                rows += chunk.count("\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f"Exported {rows} {options['kind']} row(s) in {elapsed:.1f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s).")
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.synthetic import (
+    DEFAULT_BATCH_SIZE, DEFAULT_SKEW, generate_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset (users with profiles, "
+        "articles, comments and likes) for scale testing. Uses COPY on "
+        "PostgreSQL and bulk_create elsewhere; the same --seed yields the "
+        "same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--articles", type=int, default=10_000)
+        parser.add_argument("--comments", type=int, default=50_000)
+        parser.add_argument("--likes", type=int, default=50_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix", default="synth",
+            help="Usernames and slugs are <prefix>-<n>; must be unused.")
+        parser.add_argument(
+            "--password", default="synthetic",
+            help="Password of every generated user.")
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="Spread creation times over this many days.")
+        parser.add_argument(
+            "--skew", type=float, default=DEFAULT_SKEW,
+            help="Power-law exponent of article popularity and author "
+                 "activity (0 = uniform).")
+        parser.add_argument(
+            "--reply-ratio", type=float, default=0.0,
+            help="Share of comments posted as replies (0..1), building "
+                 "threads.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--no-search-vectors", action="store_true",
+            help="Leave Article.search_vector NULL (much faster on PostgreSQL).")
+
+    def handle(self, *args, **options):
+        counts = [options[k] for k in ("users", "articles", "comments", "likes")]
+        if min(counts) < 0 or options["batch_size"] < 1 or options["days"] < 1:
+            raise CommandError("Counts must be >= 0; --batch-size and --days >= 1.")
+        if not 0 <= options["reply_ratio"] <= 1:
+            raise CommandError("--reply-ratio must be between 0 and 1.")
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(
+                f"Users named {prefix}-<n> already exist; pick another --prefix.")
+
+        def progress(table, done):
+            self.stdout.write(f"{table}: {done} rows")
+
+        try:
+            result = generate_dataset(
+                *counts, seed=options["seed"], prefix=prefix,
+                password=options["password"], days=options["days"],
+                skew=options["skew"], reply_ratio=options["reply_ratio"],
+                batch_size=options["batch_size"],
+                search_vectors=not options["no_search_vectors"],
+                progress=progress)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        summary = ", ".join(f"{n} {table}" for table, n in result.counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {result.rows} rows ({summary}) in {result.elapsed:.1f}s "
+            f"({result.rows_per_second:.0f} rows/s)."))
@@ -0,0 +1,47 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.importing import DEFAULT_BATCH_SIZE, import_articles
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import articles from a JSON Lines file (one "
+        '{"title": ..., "content": ..., "tags": [ids]} object per line; '
+        '"-" for stdin).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--author", required=True,
+                            help="Username the imported articles belong to.")
+        parser.add_argument("--batch-size", type=int,
+                            default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options["author"])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown author {options['author']!r}")
+
+        def progress(result):
+            self.stdout.write(
+                f"{result.imported} imported, {result.rejected} rejected, "
+                f"{result.rows_per_second:.0f} rows/s")
+
+        if options["path"] == "-":
+            result = import_articles(
+                sys.stdin, author, options["batch_size"], progress)
+        else:
+            with open(options["path"], encoding="utf-8") as fh:
+                result = import_articles(
+                    fh, author, options["batch_size"], progress)
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} article(s), rejected "
+            f"{result.rejected}, in {result.elapsed:.1f}s "
+            f"({result.rows_per_second:.0f} rows/s)."))
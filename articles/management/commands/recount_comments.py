@@ -0,0 +1,11 @@
+from articles.management.recount import RecountCommand
+from articles.models import Article, Comment
+
+
+class Command(RecountCommand):
+    help = "Reconcile the denormalized Article.comments_count with Comment rows."
+
+    model = Article
+    counter = "comments_count"
+    source = Comment
+    source_field = "article"
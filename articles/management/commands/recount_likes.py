@@ -0,0 +1,11 @@
+from articles.management.recount import RecountCommand
+from articles.models import Article, PostUserLikes
+
+
+class Command(RecountCommand):
+    help = "Reconcile the denormalized Article.likes_count with PostUserLikes rows."
+
+    model = Article
+    counter = "likes_count"
+    source = PostUserLikes
+    source_field = "article"
@@ -0,0 +1,12 @@
+from articles.management.recount import RecountCommand
+from articles.models import ArticleTag, Tag
+
+
+class Command(RecountCommand):
+    help = "Reconcile the denormalized Tag.articles_count with article tags."
+
+    model = Tag
+    counter = "articles_count"
+    source = ArticleTag
+    source_field = "tag"
+    label_field = "name"
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from articles.caching import bump_content_version
+from articles.counts import related_count
+
+
+class RecountCommand(BaseCommand):
+    """
+    Reconcile a denormalized counter with the rows it counts. Subclasses
+    name the counter (`model.counter`, refreshed by the queryset's
+    `refresh_<counter>()`) and what it counts (`source` rows whose
+    `source_field` points at the counted row).
+    """
+
+    model = None
+    counter = None
+    source = None
+    source_field = None
+    # Field shown for each drifted row in --dry-run output.
+    label_field = "pk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help=f"Only report {self.model._meta.verbose_name_plural} "
+                 "whose stored count has drifted.",
+        )
+
+    def handle(self, *args, **options):
+        noun = f"{self.model._meta.verbose_name}(s)"
+        drifted = (
+            self.model.objects.annotate(
+                actual=related_count(self.source, self.source_field))
+            .exclude(**{self.counter: F("actual")})
+        )
+
+        if options["dry_run"]:
+            rows = list(drifted.values_list(
+                self.label_field, self.counter, "actual"))
+            for label, stored, real in rows:
+                self.stdout.write(
+                    f"{self.model.__name__}<{label}>: stored={stored} actual={real}")
+            self.stdout.write(f"{len(rows)} {noun} out of sync.")
+            return
+
+        with transaction.atomic():
+            stale = self.model.objects.filter(pk__in=drifted.values("pk"))
+            fixed = getattr(stale, f"refresh_{self.counter}")()
+        if fixed:
+            bump_content_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {self.counter} on {fixed} {noun}."))
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes_count(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    PostUserLikes = apps.get_model('articles', 'PostUserLikes')
+    counts = (
+        PostUserLikes.objects.filter(article=models.OuterRef('pk'))
+        .order_by()
+        .values('article')
+        .annotate(c=models.Count('pk'))
+        .values('c')
+    )
+    Article.objects.update(
+        likes_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_alter_comment_options_alter_postuserlikes_options_and_more'),
+        ('users', '0002_alter_userprofile_options_userprofile_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='postuserlikes',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterUniqueTogether(
+            name='postuserlikes',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postuserlikes',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='slug',
+            field=models.SlugField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='postuserlikes',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_likes', to='users.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['created_at'], name='articles_ar_created_b5cc75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['slug'], name='articles_ar_slug_452037_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['likes_count'], name='articles_ar_likes_c_e98ce8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='articles_co_created_94aa62_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'created_at'], name='articles_co_article_1d93b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postuserlikes',
+            index=models.Index(fields=['user', 'article'], name='articles_po_user_id_f1e643_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postuserlikes',
+            index=models.Index(fields=['article', 'created_at'], name='articles_po_article_1b3a95_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postuserlikes',
+            constraint=models.UniqueConstraint(fields=('user', 'article'), name='unique_like_per_user_article'),
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+    ]
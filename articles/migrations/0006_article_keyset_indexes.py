@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_article_likes_count'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='article',
+            name='articles_ar_likes_c_e98ce8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['created_at', 'id'], name='articles_ar_created_707b24_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['likes_count', 'id'], name='articles_ar_likes_c_0d2c9b_idx'),
+        ),
+    ]
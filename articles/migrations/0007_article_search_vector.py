@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:29
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indexes are PostgreSQL-only; other backends keep the ILIKE fallback.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Article = apps.get_model('articles', 'Article')
+    config = settings.ARTICLE_SEARCH_CONFIG
+    Article.objects.update(
+        search_vector=SearchVector('title', weight='A', config=config)
+        + SearchVector('content', weight='B', config=config)
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS articles_article_search_gin '
+        'ON articles_article USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS articles_article_search_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Cast, LPad
+
+
+def backfill_path(apps, schema_editor):
+    # Existing comments are all top-level: the path is the padded pk.
+    Comment = apps.get_model('articles', 'Comment')
+    Comment.objects.filter(path='').update(path=LPad(
+        Cast('pk', output_field=models.CharField()), 10, models.Value('0')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_comment_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='articles.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=250),
+        ),
+        migrations.RunPython(backfill_path, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'path'], name='comment_article_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('parent__isnull', True)), fields=['article', 'path'], name='comment_root_path_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_comments_count(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Comment = apps.get_model('articles', 'Comment')
+    counts = (
+        Comment.objects.filter(article=models.OuterRef('pk'))
+        .order_by()
+        .values('article')
+        .annotate(c=models.Count('pk'))
+        .values('c')
+    )
+    Article.objects.update(
+        comments_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_comment_threading'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_articles_count(apps, schema_editor):
+    Tag = apps.get_model('articles', 'Tag')
+    ArticleTag = apps.get_model('articles', 'ArticleTag')
+    counts = (
+        ArticleTag.objects.filter(tag=models.OuterRef('pk'))
+        .order_by()
+        .values('tag')
+        .annotate(c=models.Count('pk'))
+        .values('c')
+    )
+    Tag.objects.update(
+        articles_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0011_article_comments_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['name']},
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='articles_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # Article.tags gets an explicit through model over the existing
+        # join table; the same table, columns and constraint names.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArticleTag',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='articles.article')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='articles.tag')),
+                    ],
+                    options={
+                        'db_table': 'articles_article_tags',
+                        'unique_together': {('article', 'tag')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='article',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='articles', through='articles.ArticleTag', to='articles.tag'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='articletag',
+            index=models.Index(fields=['tag', 'article'], name='article_tag_tag_article_idx'),
+        ),
+        # covered by the (tag, article) index
+        migrations.AlterField(
+            model_name='articletag',
+            name='tag',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='articles.tag'),
+        ),
+        migrations.RunPython(backfill_articles_count, migrations.RunPython.noop),
+    ]
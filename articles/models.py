@@ -1,7 +1,158 @@
-from django.db import models
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, connections, models, router, transaction
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models import Case, Max, Q, Value, When
+from django.db.models.functions import Cast, Substr
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .caching import bump_content_version
+from .counts import invalidate_row_count, related_count
+
+# Room left after the slug base for a "-<n>" suffix within max_length=255.
+SLUG_BASE_MAX_LENGTH = 240
+SLUG_ALLOCATION_ATTEMPTS = 5
+# Comment.path is the comment's ancestors' pks and its own, each zero-padded
+# to PATH_SEGMENT_WIDTH digits (enough for any 32-bit pk): sorting by path
+# gives display order and a subtree is one contiguous path range. Digits
+# only, so every collation orders paths the same way.
+PATH_SEGMENT_WIDTH = 10
+MAX_THREAD_DEPTH = 25
+# Sorts after every path: no pk reaches 10 nines.
+PATH_END = "9" * PATH_SEGMENT_WIDTH
+
+
+def slug_base(title):
+    return slugify(title)[:SLUG_BASE_MAX_LENGTH].strip("-") or "untitled"
+
+
+def path_segment(pk):
+    return f"{pk:0{PATH_SEGMENT_WIDTH}d}"
+
+
+def subtree_end(path):
+    """The first path after `path` and all of its descendants."""
+    return path[:-PATH_SEGMENT_WIDTH] + path_segment(
+        int(path[-PATH_SEGMENT_WIDTH:]) + 1)
+
+
+def article_search_vector():
+    """Weighted tsvector expression: title (A) ranks above content (B)."""
+    config = settings.ARTICLE_SEARCH_CONFIG
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("content", weight="B", config=config)
+    )
+
+
+class ArticleQuerySet(models.QuerySet):
+    def update_search_vector(self):
+        """
+        Recompute search_vector for every row in the queryset with a single
+        UPDATE. Call after bulk_create()/update() paths that bypass save().
+        No-op outside PostgreSQL.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return 0
+        return self.update(search_vector=article_search_vector())
+
+    def refresh_likes_count(self):
+        """
+        Recompute likes_count from PostUserLikes for every row in the
+        queryset with one UPDATE; exact even when concurrent writers raced.
+        """
+        return self.update(likes_count=related_count(PostUserLikes, "article"))
+
+    def refresh_comments_count(self):
+        """Recompute comments_count from Comment rows with one UPDATE."""
+        return self.update(comments_count=related_count(Comment, "article"))
+
+    def last_slug_suffix(self, base):
+        """
+        Highest suffix in use for `base` with one indexed query: `base`
+        itself counts as 1 and `base-<n>` as n. None only when neither
+        `base` nor any `base-<n>` exists.
+        """
+        as_int = models.BigIntegerField()
+        suffix = Cast(Substr("slug", len(base) + 2), output_field=as_int)
+        if connections[self.db].vendor == "sqlite":
+            # SQLite's LIKE is case-insensitive and cannot use the slug
+            # index; a range over the BINARY-collated column can.
+            prefix = Q(slug__gte=f"{base}-0", slug__lt=f"{base}-:")
+        else:
+            prefix = Q(slug__startswith=f"{base}-")
+        return self.filter(
+            Q(slug=base)
+            | prefix & Q(slug__regex=rf"^{re.escape(base)}-[0-9]{{1,18}}$")
+        ).aggregate(
+            top=Max(Case(When(slug=base, then=Value(1)), default=suffix,
+                         output_field=as_int))
+        )["top"]
+
+    def allocate_slugs(self, articles, known_suffixes=None):
+        """
+        Assign unique slugs to every article in `articles` without one,
+        with one query per distinct slug base (not per article or
+        candidate). Articles sharing a base get consecutive suffixes.
+
+        `known_suffixes` ({base: last suffix}) lets a caller inserting many
+        batches skip the query for bases it already allocated; it is
+        updated in place. The unique constraint still guards against
+        concurrent writers.
+        """
+        if known_suffixes is None:
+            known_suffixes = {}
+        pending = defaultdict(list)
+        for article in articles:
+            if not article.slug:
+                pending[slug_base(article.title)].append(article)
+        for base, group in pending.items():
+            if base in known_suffixes:
+                top = known_suffixes[base]
+            else:
+                top = self.last_slug_suffix(base)
+            for article in group:
+                top = 1 if top is None else top + 1
+                article.slug = base if top == 1 else f"{base}-{top}"
+            known_suffixes[base] = top
+        return articles
+
+
+class TagQuerySet(models.QuerySet):
+    def refresh_articles_count(self):
+        """Recompute articles_count from the join rows with one UPDATE."""
+        return self.update(articles_count=related_count(ArticleTag, "tag"))
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    # Denormalized count of tagged articles; maintained by the m2m_changed
+    # and Article pre_delete receivers below and articles.tagging, and
+    # reconciled with `manage.py recount_tags`.
+    articles_count = models.PositiveIntegerField(default=0)
+
+    objects = TagQuerySet.as_manager()
+
+    @staticmethod
+    def normalize_name(name):
+        return " ".join(str(name).split()).lower()
+
+    def __str__(self) -> str:
+        return self.name
+
+    class Meta:
+        ordering = ["name"]
+
+
+# Article columns written only with F() updates, never by a full save().
+STORED_COUNTERS = ("likes_count", "comments_count")
+
 
 class Article(models.Model):
     author = models.ForeignKey(
@@ -11,23 +162,63 @@ class Article(models.Model):
     content = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized count of PostUserLikes rows; maintained by the likes
+    # endpoints and reconciled with `manage.py recount_likes`.
+    likes_count = models.PositiveIntegerField(default=0)
+    # Denormalized count of Comment rows; maintained by Comment.save() and
+    # Comment.delete() (bulk deletes bypass them) and reconciled with
+    # `manage.py recount_comments`.
+    comments_count = models.PositiveIntegerField(default=0)
+    # Full-text search document (PostgreSQL only, GIN-indexed in migration
+    # 0007); refreshed by save() and ArticleQuerySet.update_search_vector().
+    search_vector = SearchVectorField(null=True, editable=False)
+    tags = models.ManyToManyField(
+        Tag, blank=True, related_name="articles", through="ArticleTag")
+
+    objects = ArticleQuerySet.as_manager()
 
     def _build_unique_slug(self) -> str:
-        base = slugify(self.title) or "untitled"
-        candidate = base
-        i = 2
-        while Article.objects.filter(slug=candidate).exclude(pk=self.pk).exists():
-            candidate = f"{base}-{i}"
-            i += 1
-        return candidate
+        base = slug_base(self.title)
+        top = Article.objects.exclude(pk=self.pk).last_slug_suffix(base)
+        return base if top is None else f"{base}-{top + 1}"
 
     def save(self, *args, **kwargs):
+        requested_fields = kwargs.get("update_fields")
+        if (not self._state.adding and requested_fields is None
+                and not kwargs.get("force_insert")):
+            # The stored counters only move through F() updates; writing a
+            # stale in-memory value back would undo concurrent ones.
+            # search_vector is recomputed in SQL below, and deferred fields
+            # were never loaded.
+            skipped = {*STORED_COUNTERS, "search_vector"}
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in skipped
+                and f.attname not in deferred
+            ]
+
         if not self.slug:
             self.slug = self._build_unique_slug()
         else:
             if Article.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
                 self.slug = self._build_unique_slug()
-        return super().save(*args, **kwargs)
+
+        # A concurrent writer can take the slug between allocation and
+        # insert; the unique constraint catches it and we allocate again.
+        using = kwargs.get("using") or router.db_for_write(Article, instance=self)
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            try:
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError as exc:
+                if "slug" not in str(exc) or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
+                self.slug = self._build_unique_slug()
+
+        if requested_fields is None or {"title", "content"} & set(requested_fields):
+            Article.objects.filter(pk=self.pk).update_search_vector()
 
     def __str__(self) -> str:
         return f"{self.title} (#{self.pk})"
@@ -37,16 +228,90 @@ class Article(models.Model):
         indexes = [
             models.Index(fields=["created_at"]),
             models.Index(fields=["slug"]),
+            # keyset pagination: (ordering column, id) tiebreaker pairs
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["likes_count", "id"]),
         ]
 
 
+class ArticleTag(models.Model):
+    """Article.tags join row (the table migration 0002 created)."""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    # indexed by the (tag, article) index below
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        db_table = "articles_article_tags"
+        unique_together = [("article", "tag")]
+        indexes = [
+            # ?tag= filters: tag -> article ids as an index-only scan
+            models.Index(fields=["tag", "article"], name="article_tag_tag_article_idx"),
+        ]
+
+
+class CommentQuerySet(models.QuerySet):
+    def thread(self, article_id):
+        """Every comment on the article, in display (path) order."""
+        return self.filter(article_id=article_id).order_by("path")
+
+    def subtree(self, comment):
+        """All replies below `comment`, at any depth, in display order."""
+        return self.filter(
+            article_id=comment.article_id,
+            path__gt=comment.path,
+            path__lt=subtree_end(comment.path),
+        ).order_by("path")
+
+
 class Comment(models.Model):
     article = models.ForeignKey(
         Article, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="comments")
+    # Reply threading: `parent` is the comment replied to (None for
+    # top-level comments); `path` is assigned on insert, see PATH_SEGMENT_WIDTH.
+    parent = models.ForeignKey(
+        "self", on_delete=models.CASCADE, null=True, blank=True,
+        related_name="replies")
+    path = models.CharField(
+        max_length=PATH_SEGMENT_WIDTH * MAX_THREAD_DEPTH, default="",
+        editable=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    @property
+    def depth(self):
+        """0 for top-level comments, 1 for their replies, ..."""
+        return max(len(self.path) // PATH_SEGMENT_WIDTH - 1, 0)
+
+    def save(self, *args, **kwargs):
+        if self.path:
+            return super().save(*args, **kwargs)
+        # The path ends with our own pk, so it is written right after the
+        # insert, in the same transaction as the article's count.
+        using = kwargs.get("using") or router.db_for_write(Comment, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = prefix + path_segment(self.pk)
+            Comment.objects.using(using).filter(pk=self.pk).update(path=self.path)
+            Article.objects.using(using).filter(pk=self.article_id).update(
+                comments_count=models.F("comments_count") + 1)
+
+    def delete(self, *args, **kwargs):
+        # Replies go with their parent; the article loses all of them.
+        using = kwargs.get("using") or router.db_for_write(Comment, instance=self)
+        with transaction.atomic(using=using):
+            deleted, per_model = super().delete(*args, **kwargs)
+            removed = per_model.get(self._meta.label, 0)
+            if removed:
+                Article.objects.using(using).filter(
+                    pk=self.article_id, comments_count__gte=removed,
+                ).update(comments_count=models.F("comments_count") - removed)
+        return deleted, per_model
 
     def __str__(self) -> str:
         return f"Comment<{self.pk}> on Article<{self.article_id}>"
@@ -56,6 +321,11 @@ class Comment(models.Model):
         indexes = [
             models.Index(fields=["created_at"]),
             models.Index(fields=["article", "created_at"]),
+            # threads and subtrees: range scans in display order
+            models.Index(fields=["article", "path"], name="comment_article_path_idx"),
+            # top-level comments only, to find thread page boundaries
+            models.Index(fields=["article", "path"], name="comment_root_path_idx",
+                         condition=Q(parent__isnull=True)),
         ]
 
 
@@ -87,3 +357,109 @@ class PostUserLikes(models.Model):
 
     def __str__(self) -> str:
         return f"Like<user={self.user_id}, article={self.article_id}>"
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=PostUserLikes)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=PostUserLikes)
+def invalidate_cached_row_count(sender, created=True, **kwargs):
+    if created:
+        invalidate_row_count(sender)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=PostUserLikes)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=PostUserLikes)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=ArticleTag)
+def invalidate_cached_responses(sender, **kwargs):
+    bump_content_version()
+
+
+def _shift_tag_counts(deltas, using):
+    """Add {tag_id: delta} to Tag.articles_count in one UPDATE."""
+    deltas = {pk: d for pk, d in deltas.items() if d}
+    if not deltas:
+        return
+    Tag.objects.using(using).filter(pk__in=deltas).update(
+        articles_count=Case(
+            *(When(pk=pk, then=models.F("articles_count") + d)
+              for pk, d in deltas.items()),
+            default=models.F("articles_count"),
+            output_field=models.PositiveIntegerField(),
+        ))
+
+
+@receiver(m2m_changed, sender=ArticleTag)
+def maintain_tag_counts(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Keep Tag.articles_count in step with article.tags.add/remove/set/clear
+    (and tag.articles.*). post_add's pk_set holds only the rows actually
+    inserted; for removals the linked rows are looked up first.
+    """
+    if action in ("pre_remove", "pre_clear"):
+        links = sender.objects.using(using)
+        links = links.filter(tag=instance) if reverse else links.filter(article=instance)
+        if action == "pre_remove":
+            links = links.filter(**{("article" if reverse else "tag") + "__in": pk_set})
+        if reverse:
+            instance._tag_links_removed = {instance.pk: links.count()}
+        else:
+            instance._tag_links_removed = dict.fromkeys(
+                links.values_list("tag_id", flat=True), 1)
+    elif action in ("post_remove", "post_clear"):
+        removed = getattr(instance, "_tag_links_removed", {})
+        instance._tag_links_removed = {}
+        _shift_tag_counts({pk: -n for pk, n in removed.items()}, using)
+    elif action == "post_add" and pk_set:
+        if reverse:
+            _shift_tag_counts({instance.pk: len(pk_set)}, using)
+        else:
+            _shift_tag_counts(dict.fromkeys(pk_set, 1), using)
+
+
+def _touch_articles(articles):
+    """
+    New updated_at (and so new detail ETag/Last-Modified) for `articles`,
+    whose serialized tags changed without the article itself being saved.
+    """
+    articles.update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=ArticleTag)
+def touch_retagged_articles(sender, instance, action, reverse, pk_set, using, **kwargs):
+    articles = Article.objects.using(using)
+    if reverse:
+        if action == "pre_clear":
+            _touch_articles(articles.filter(
+                pk__in=sender.objects.filter(tag=instance).values("article_id")))
+        elif action in ("post_add", "post_remove") and pk_set:
+            _touch_articles(articles.filter(pk__in=pk_set))
+    elif action == "post_clear" or (action in ("post_add", "post_remove") and pk_set):
+        instance.updated_at = timezone.now()
+        articles.filter(pk=instance.pk).update(updated_at=instance.updated_at)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tagged_articles(sender, instance, using, created=False, **kwargs):
+    # a renamed or deleted tag changes every tagged article's tag_names
+    if not created:
+        _touch_articles(Article.objects.using(using).filter(
+            pk__in=ArticleTag.objects.filter(tag=instance).values("article_id")))
+
+
+@receiver(pre_delete, sender=Article)
+def release_article_tags(sender, instance, using, **kwargs):
+    # The join rows go with the article (cascade, no m2m_changed).
+    Tag.objects.using(using).filter(
+        pk__in=ArticleTag.objects.filter(article=instance).values("tag_id"),
+        articles_count__gt=0,
+    ).update(articles_count=models.F("articles_count") - 1)
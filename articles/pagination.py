@@ -1,7 +1,333 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.encoding import force_str
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .counts import row_count_estimate
+from .models import PATH_END, PATH_SEGMENT_WIDTH
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over the queryset's own ordering, with the
+    primary key appended as a tiebreaker. The cursor stores the ordering
+    values of the last row, so every page is a range scan on the matching
+    index instead of an OFFSET + COUNT(*).
+
+    Pass an empty ?cursor= to get the first page, then follow "next".
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip("-"))
+            for name in self.ordering
+        ]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor (empty for the first page).",
+                "schema": {"type": "string"},
+            },
+        ]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        pk_name = queryset.model._meta.pk.name
+        ordering = []
+        for name in queryset.query.order_by or queryset.model._meta.ordering:
+            field = name.lstrip("-")
+            if field == "pk":
+                field = pk_name
+            ordering.append(f"-{field}" if name.startswith("-") else field)
+        if all(o.lstrip("-") != pk_name for o in ordering):
+            descending = bool(ordering) and ordering[0].startswith("-")
+            ordering.append(f"-{pk_name}" if descending else pk_name)
+        return ordering
+
+    def get_next_link(self, url=None):
+        """Link to the next page: `url` (default: this request's) + cursor."""
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        position = [
+            field.value_to_string(last) for field in self.fields]
+        return replace_query_param(
+            url or self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(position),
+        )
+
+    def encode_cursor(self, position):
+        payload = json.dumps({"o": self.ordering, "v": position})
+        return urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if payload["o"] != self.ordering:
+                raise ValueError("ordering changed")
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, payload["v"], strict=True)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(force_str(self.invalid_cursor_message))
+
+    def _seek_filter(self, position):
+        # (a, b, c) > (va, vb, vc) expanded into
+        #   a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+        # with a leading a >= va so the planner can range-scan the index.
+        lookups = []
+        for name in self.ordering:
+            lookups.append(
+                (name.lstrip("-"), "lt" if name.startswith("-") else "gt"))
+
+        seek = Q()
+        equal = Q()
+        for (name, op), value in zip(lookups, position):
+            seek |= equal & Q(**{f"{name}__{op}": value})
+            equal &= Q(**{name: value})
+
+        lead_name, lead_op = lookups[0]
+        return Q(**{f"{lead_name}__{lead_op}e": position[0]}) & seek
+
+
+class ThreadPagination(KeysetPagination):
+    """
+    Pages a comment thread (Comment.objects.thread()/subtree()) by
+    top-level comment: a page holds `page_size` of them with all their
+    replies, in display order, cut at `max_page_rows` rows; the next page
+    then resumes inside the cut thread. The view's `thread_parent` is the
+    comment whose replies are the top-level ones (default: None, the
+    article's own comments).
+
+    A page is one range query on (article, path); its upper bound is the
+    path of the next page's first top-level comment, looked up in a
+    subquery on the partial root index. That row comes back too and tells
+    whether there is a next page.
+    """
+    page_size = 20
+    max_page_rows = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        parent = getattr(view, "thread_parent", None)
+        if parent is None:
+            roots = queryset.filter(parent__isnull=True)
+        else:
+            roots = queryset.filter(parent_id=parent)
+        after = self.decode_cursor(request)
+        if after is not None:
+            roots = roots.filter(path__gt=after)
+            queryset = queryset.filter(path__gt=after)
+        boundary = roots.order_by("path").values("path")[
+            self.page_size:self.page_size + 1]
+        rows = list(queryset.filter(
+            path__lte=Coalesce(Subquery(boundary), Value(PATH_END))
+        ).order_by("path")[:self.max_page_rows + 1])
+
+        page_roots = sum(1 for row in rows if row.parent_id == parent)
+        self.has_next = (len(rows) > self.max_page_rows
+                         or page_roots > self.page_size)
+        if self.has_next:
+            rows.pop()
+        self.page = rows
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1].path),
+        )
+
+    def encode_cursor(self, position):
+        payload = json.dumps({"after": position})
+        return urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            path = json.loads(urlsafe_b64decode(encoded.encode("ascii")))["after"]
+            if (not isinstance(path, str) or not path.isdigit()
+                    or not path or len(path) % PATH_SEGMENT_WIDTH):
+                raise ValueError("not a comment path")
+            return path
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(force_str(self.invalid_cursor_message))
+
+
+class ApproximatePage(Page):
+    """A page whose has_next() comes from fetching one row past it."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """
+    Paginator that skips COUNT(*) on unfiltered querysets over large tables
+    and uses row_count_estimate() instead. Filtered querysets, and tables
+    below exact_count_threshold rows, still get an exact count.
+
+    An estimated count is only reported: pages are then fetched with one
+    extra row to tell whether a next page exists, and any page past the
+    estimate is served while it still has rows.
+    """
+    exact_count_threshold = 10_000
+    is_approximate = False
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is None or query.where or query.distinct or query.combinator:
+            return super().count
+        rows, exact = row_count_estimate(self.object_list)
+        if rows >= self.exact_count_threshold:
+            self.is_approximate = True
+            return rows
+        if exact:
+            return rows
+        return super().count
+
+    def validate_number(self, number):
+        if not self.count or not self.is_approximate:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return ApproximatePage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page)
 
 
 class DefaultPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; requests carrying ?cursor= switch
+    to KeysetPagination so deep pages stay as cheap as the first one.
+    "count" may be an estimate on large unfiltered lists, in which case
+    "count_is_approximate" is true.
+    """
     page_size = 10
     page_size_query_param = "page_size"
-    max_page_size = 50
+    max_page_size = 100
+    django_paginator_class = ApproximateCountPaginator
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response(OrderedDict([
+            ("count", self.page.paginator.count),
+            ("count_is_approximate", self.page.paginator.is_approximate),
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_approximate"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            super().get_schema_operation_parameters(view)
+            + self.keyset_class().get_schema_operation_parameters(view)
+        )
@@ -1,13 +1,67 @@
 from django.contrib.auth.models import User
 from django.db import IntegrityError
 from rest_framework import serializers
-from .models import Article, Comment, PostUserLikes
+from .models import MAX_THREAD_DEPTH, Article, Comment, PostUserLikes, Tag
+from .tagging import normalize_names
+
+
+def _liked_article_ids(profile_id, article_ids):
+    return set(
+        PostUserLikes.objects.filter(
+            user_id=profile_id, article_id__in=article_ids)
+        .values_list("article_id", flat=True)
+    )
+
+
+# Viewer-specific article flags: field name -> resolver(profile_id, article_ids)
+# returning the subset of ids for which the flag is true. Each resolver costs
+# one query per serialized page, independent of page size.
+VIEWER_FIELD_RESOLVERS = {
+    "user_liked": _liked_article_ids,
+}
+
+
+def resolve_viewer_state(profile_id, articles):
+    """
+    Resolve every VIEWER_FIELD_RESOLVERS flag for an article page (or a single
+    article) and return {field_name: set(article_ids)} for serializer context.
+    """
+    if isinstance(articles, Article):
+        articles = [articles]
+    ids = [a.pk for a in articles]
+    if profile_id is None or not ids:
+        return {name: set() for name in VIEWER_FIELD_RESOLVERS}
+    return {
+        name: resolver(profile_id, ids)
+        for name, resolver in VIEWER_FIELD_RESOLVERS.items()
+    }
+
+
+class ViewerFlagField(serializers.BooleanField):
+    """
+    Read-only flag looked up in context["viewer_state"] (see
+    resolve_viewer_state) instead of being annotated on the queryset.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        state = self.context.get("viewer_state") or {}
+        return value.pk in state.get(self.field_name, ())
 
 
 class ArticleSerializer(serializers.ModelSerializer):
     likes_count = serializers.IntegerField(read_only=True)
-    user_liked = serializers.BooleanField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    user_liked = ViewerFlagField()
     author = serializers.PrimaryKeyRelatedField(read_only=True)
+    # read from the view's prefetch_related("tags")
+    tags = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Tag.objects.all(), required=False)
+    tag_names = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
@@ -20,7 +74,10 @@ class ArticleSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "likes_count",
+            "comments_count",
             "user_liked",
+            "tags",
+            "tag_names",
         ]
         read_only_fields = (
             "id",
@@ -29,20 +86,130 @@ class ArticleSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "likes_count",
+            "comments_count",
             "user_liked",
+            "tag_names",
         )
 
+    def get_tag_names(self, article):
+        return [tag.name for tag in article.tags.all()]
+
+
+class ArticleImportSerializer(ArticleSerializer):
+    """
+    ArticleSerializer for bulk-import lines. Tags are plain ids here; the
+    importer checks them with one query per batch instead of one per id.
+    """
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False)
+
+
+class ArticleDetailSerializer(ArticleSerializer):
+    """
+    Article plus the first page of its comments, newest first, as
+    {"next", "results"}; the view puts the page in context["comments"].
+    """
+    comments = serializers.SerializerMethodField()
+
+    class Meta(ArticleSerializer.Meta):
+        fields = ArticleSerializer.Meta.fields + ["comments"]
+
+    def get_comments(self, article):
+        return self.context["comments"]
+
+
+class ArticleSuggestionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Article
+        fields = ["id", "slug", "title"]
+        read_only_fields = fields
+
 
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.PrimaryKeyRelatedField(read_only=True)
     article = serializers.PrimaryKeyRelatedField(
         queryset=Article.objects.all())
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.all(), required=False, allow_null=True)
+    depth = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Comment
-        fields = ["id", "article", "author", "content", "created_at"]
+        fields = ["id", "article", "parent", "depth", "author", "content",
+                  "created_at"]
         read_only_fields = ("id", "author", "created_at")
 
+    def validate(self, attrs):
+        # A comment's place in a thread is fixed once it is created.
+        if self.instance is not None:
+            for name in ("article", "parent"):
+                if name in attrs and attrs[name] != getattr(self.instance, name):
+                    raise serializers.ValidationError(
+                        {name: ["Cannot be changed."]})
+            return attrs
+        parent = attrs.get("parent")
+        if parent is not None:
+            if parent.article_id != attrs["article"].pk:
+                raise serializers.ValidationError(
+                    {"parent": ["Must be a comment on the same article."]})
+            if parent.depth + 1 >= MAX_THREAD_DEPTH:
+                raise serializers.ValidationError(
+                    {"parent": [f"Threads are at most {MAX_THREAD_DEPTH} levels deep."]})
+        return attrs
+
+
+class ArticleCommentSerializer(CommentSerializer):
+    """
+    CommentSerializer for POST /articles/<id>/comments/: the article comes
+    from the URL (context["article"]), not the request body.
+    """
+    article = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    def validate(self, attrs):
+        super().validate({**attrs, "article": self.context["article"]})
+        return attrs
+
+
+class TagSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(max_length=64)
+
+    class Meta:
+        model = Tag
+        fields = ["id", "name", "articles_count"]
+        read_only_fields = ["id", "articles_count"]
+
+    def validate_name(self, value):
+        name = Tag.normalize_name(value)
+        if not name:
+            raise serializers.ValidationError("This field may not be blank.")
+        taken = Tag.objects.filter(name=name)
+        if self.instance is not None:
+            taken = taken.exclude(pk=self.instance.pk)
+        if taken.exists():
+            raise serializers.ValidationError("A tag with this name already exists.")
+        return name
+
+
+class TagBatchSerializer(serializers.Serializer):
+    articles = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), max_length=1000)
+    add = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        required=False, default=list, max_length=50)
+    remove = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        required=False, default=list, max_length=50)
+
+    def validate(self, attrs):
+        attrs["add"] = normalize_names(attrs["add"])
+        attrs["remove"] = normalize_names(attrs["remove"])
+        if set(attrs["add"]) & set(attrs["remove"]):
+            raise serializers.ValidationError(
+                "A tag cannot be added and removed in the same batch.")
+        if not attrs["add"] and not attrs["remove"]:
+            raise serializers.ValidationError("Nothing to add or remove.")
+        return attrs
+
 
 class PostUserLikeSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -61,3 +228,18 @@ class PostUserLikeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {"article": ["You already liked this article."]}
             )
+
+
+class LikeBatchSerializer(serializers.Serializer):
+    like = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False, default=list, max_length=500)
+    unlike = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False, default=list, max_length=500)
+
+    def validate(self, attrs):
+        if set(attrs["like"]) & set(attrs["unlike"]):
+            raise serializers.ValidationError(
+                "An article cannot be liked and unliked in the same batch.")
+        return attrs
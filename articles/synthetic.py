@@ -0,0 +1,347 @@
+"""
+Deterministic synthetic datasets for scale testing (`manage.py
+generate_dataset`).
+
+The same seed always yields the same rows. Rows are streamed to the
+database `batch_size` at a time, with COPY on PostgreSQL and bulk_create
+elsewhere, so memory does not grow with the number of rows. Only a few
+per-article integers are kept.
+
+Shape of the data:
+  - users, each with a UserProfile, all sharing one password;
+  - articles with log-normally distributed lengths (most are short, a few
+    are very long) and authors drawn from a power law over users;
+  - comments and likes drawn from a power law over articles, so a few
+    articles get most of the traffic; at most one like per profile and
+    article, and likes_count/comments_count match the rows;
+  - with `reply_ratio`, that share of comments are replies within the
+    article's thread, half of them to the latest comment, so long reply
+    chains (deep threads) form on busy articles.
+Timestamps fall in the `days` before DATASET_END, and a comment or like
+is never older than its article (nor a reply than its parent).
+"""
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from users.models import UserProfile
+
+from .autocomplete import suggestion_cache
+from .caching import bump_content_version
+from .counts import invalidate_row_count
+from .models import (
+    MAX_THREAD_DEPTH, PATH_SEGMENT_WIDTH, Article, Comment, PostUserLikes,
+    path_segment,
+)
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_SKEW = 1.1
+# Fixed, so timestamps are reproducible too.
+DATASET_END = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+WORDS = (
+    "django python postgres index query cache latency throughput vector "
+    "search rank article comment like author draft release weekly update "
+    "performance database replica cursor page token profile tag thread "
+    "server client request response worker queue deploy metric trace log "
+    "schema migration model view router serializer pool connection lock "
+    "batch stream event signal storage memory disk network kernel build "
+    "test review design pattern feature bug fix note idea story guide"
+).split()
+# Text is assembled from a fixed pool of generated paragraphs; drawing
+# every word per article would dominate the run time at millions of rows.
+PARAGRAPH_POOL_SIZE = 2000
+
+
+class DatasetResult:
+    def __init__(self):
+        self.counts = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return sum(self.counts.values())
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def generate_dataset(users, articles, comments=0, likes=0, *, seed=0,
+                     prefix="synth", password="synthetic", days=365,
+                     skew=DEFAULT_SKEW, batch_size=DEFAULT_BATCH_SIZE,
+                     reply_ratio=0.0, search_vectors=True, progress=None):
+    """
+    Insert `users` users (usernames "<prefix>-<n>", each with a profile),
+    `articles` articles by them, and roughly `comments` comments and
+    `likes` likes (fewer likes if the most popular articles run out of
+    distinct users). Returns a DatasetResult; `progress(table, done)` is
+    called after every batch. `reply_ratio` (0..1) is the share of
+    comments posted as replies.
+
+    Computing search_vector is ~40% of a PostgreSQL run; with
+    `search_vectors=False` it stays NULL (fill it later with
+    ArticleQuerySet.update_search_vector()).
+    """
+    if users < 1 and (articles or comments or likes):
+        raise ValueError("Articles, comments and likes need at least one user.")
+    rng = random.Random(seed)
+    result = DatasetResult()
+    start = DATASET_END - timedelta(days=days)
+    span = (DATASET_END - start).total_seconds()
+    paragraphs = _paragraph_pool(rng)
+
+    def report(table, done):
+        result.counts[table] = done
+        result.elapsed = time.perf_counter() - result.started
+        if progress is not None:
+            progress(table, done)
+
+    # Users: one password hash shared by all, so benchmarks can log in.
+    password_hash = make_password(password)
+    joined = [start + timedelta(seconds=span * i / max(users, 1))
+              for i in range(users)]
+    user_ids = _insert(User, (
+        {"username": f"{prefix}-{i}", "email": f"{prefix}-{i}@example.com",
+         "password": password_hash, "date_joined": joined[i]}
+        for i in range(users)
+    ), batch_size, report)
+    # bulk inserts skip the post_save receiver that creates profiles
+    profile_ids = _insert(UserProfile, (
+        {"user_id": user_ids[i], "created_at": joined[i],
+         "updated_at": joined[i]}
+        for i in range(users)
+    ), batch_size, report)
+
+    # Popularity: article i has rank popularity[i]; counts are drawn up
+    # front so likes_count and comments_count can be written with the
+    # article row.
+    author_weights = _power_law(users, skew)
+    popularity = list(range(articles))
+    rng.shuffle(popularity)
+    article_weights = _power_law(articles, skew)
+    comment_counts = _draw_counts(rng, articles, comments, article_weights,
+                                  popularity, batch_size)
+    like_counts = _draw_counts(rng, articles, likes, article_weights,
+                               popularity, batch_size, cap=users)
+
+    created = [start + timedelta(seconds=span * (i + rng.random()) / max(articles, 1))
+               for i in range(articles)]
+
+    def article_rows():
+        for i in range(articles):
+            title = " ".join(rng.choices(WORDS, k=rng.randint(3, 9))).capitalize()
+            # log-normal paragraph count: median 3, long tail
+            n = min(200, max(1, round(rng.lognormvariate(1.1, 0.9))))
+            yield {
+                "author_id": user_ids[_pick(rng, author_weights)],
+                "title": title,
+                "slug": f"{prefix}-{i}",
+                "content": "\n\n".join(rng.choices(paragraphs, k=n)),
+                "created_at": created[i], "updated_at": created[i],
+                "likes_count": like_counts[i],
+                "comments_count": comment_counts[i],
+            }
+
+    article_ids = _insert(Article, article_rows(), batch_size, report)
+    if search_vectors and connection.vendor == "postgresql":
+        for i in range(0, len(article_ids), batch_size):
+            chunk = article_ids[i:i + batch_size]
+            Article.objects.filter(
+                pk__gte=chunk[0], pk__lte=chunk[-1]).update_search_vector()
+
+    # Comment pks are assigned here, as paths and parents refer to them.
+    first_comment = (Comment.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+    def comment_rows():
+        pk = first_comment
+        for i, count in enumerate(comment_counts):
+            thread = []  # (path, created_at) of the article's comments so far
+            for _ in range(count):
+                parent = None
+                if thread and reply_ratio and rng.random() < reply_ratio:
+                    parent = thread[-1] if rng.random() < 0.5 else rng.choice(thread)
+                    if len(parent[0]) // PATH_SEGMENT_WIDTH >= MAX_THREAD_DEPTH:
+                        parent = None
+                path = (parent[0] if parent else "") + path_segment(pk)
+                at = _after(rng, parent[1] if parent else created[i])
+                thread.append((path, at))
+                yield {
+                    "id": pk,
+                    "article_id": article_ids[i],
+                    "author_id": user_ids[_pick(rng, author_weights)],
+                    "parent_id": (int(parent[0][-PATH_SEGMENT_WIDTH:])
+                                  if parent else None),
+                    "path": path,
+                    "content": rng.choice(paragraphs)[:rng.randint(20, 400)],
+                    "created_at": at, "updated_at": at,
+                }
+                pk += 1
+
+    def like_rows():
+        for i, count in enumerate(like_counts):
+            for profile in rng.sample(range(users), count):
+                yield {"user_id": profile_ids[profile],
+                       "article_id": article_ids[i],
+                       "created_at": _after(rng, created[i])}
+
+    _insert(Comment, comment_rows(), batch_size, report, ids=False,
+            explicit_pk=True)
+    _insert(PostUserLikes, like_rows(), batch_size, report, ids=False)
+
+    if connection.vendor == "postgresql":
+        # row_count_estimate() reads the planner statistics
+        with connection.cursor() as cursor:
+            for model in (User, UserProfile, Article, Comment, PostUserLikes):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+    # Bulk writes bypass the models' signal receivers.
+    for model in (Article, Comment, PostUserLikes):
+        invalidate_row_count(model)
+    bump_content_version()
+    suggestion_cache.clear()
+    result.elapsed = time.perf_counter() - result.started
+    return result
+
+
+def _paragraph_pool(rng):
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(15, 70))).capitalize() + "."
+        for _ in range(PARAGRAPH_POOL_SIZE)
+    ]
+
+
+def _power_law(n, skew):
+    """Cumulative weights: the item of rank k is drawn ∝ 1 / k**skew."""
+    return list(accumulate(1 / k ** skew for k in range(1, n + 1)))
+
+
+def _pick(rng, cum_weights):
+    return rng.choices(range(len(cum_weights)), cum_weights=cum_weights)[0]
+
+
+def _draw_counts(rng, n, total, cum_weights, popularity, batch_size, cap=None):
+    """Spread `total` draws over n items by rank; at most `cap` per item."""
+    counts = [0] * n
+    if not n:
+        return counts
+    ranks = range(n)
+    for done in range(0, total, batch_size):
+        for rank in rng.choices(ranks, cum_weights=cum_weights,
+                                k=min(batch_size, total - done)):
+            counts[rank] += 1
+    by_article = [counts[rank] for rank in popularity]
+    if cap is not None:
+        by_article = [min(c, cap) for c in by_article]
+    return by_article
+
+
+def _after(rng, moment):
+    return moment + (DATASET_END - moment) * rng.random()
+
+
+def _insert(model, rows, batch_size, report, ids=True, explicit_pk=False):
+    """
+    Insert dicts of attname -> value in batches; omitted fields get their
+    defaults. Returns the new primary keys in insertion order if `ids`.
+    With `explicit_pk` the rows carry their own pks and the pk sequence is
+    moved past them afterwards.
+    """
+    fields = [f for f in model._meta.concrete_fields
+              if explicit_pk or not f.primary_key]
+    table = model._meta.db_table
+    after = model.objects.aggregate(top=Max("pk"))["top"] or 0
+    done = 0
+    batch = []
+    for row in rows:
+        batch.append(tuple(
+            row[f.attname] if f.attname in row else f.get_default()
+            for f in fields
+        ))
+        if len(batch) == batch_size:
+            _write(model, fields, batch)
+            done += len(batch)
+            report(table, done)
+            batch = []
+    if batch:
+        _write(model, fields, batch)
+        done += len(batch)
+    report(table, done)
+    if explicit_pk:
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
+    if not ids:
+        return None
+    # Rows are numbered in insertion order by the pk sequence.
+    return list(model.objects.filter(pk__gt=after).order_by("pk")
+                .values_list("pk", flat=True))
+
+
+def _write(model, fields, batch):
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            _copy(model, fields, batch)
+        else:
+            with _explicit_timestamps(model):
+                model.objects.bulk_create(
+                    [model(**dict(zip((f.attname for f in fields), values)))
+                     for values in batch],
+                    batch_size=500,
+                )
+
+
+def _copy(model, fields, batch):
+    quote = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(f.column) for f in fields),
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy"):  # psycopg 3 adapts each row in C
+            with raw.copy(sql) as copy:
+                for values in batch:
+                    copy.write_row(values)
+        else:  # psycopg2
+            data = "".join(
+                "\t".join(map(_copy_value, values)) + "\n" for values in batch)
+            raw.copy_expert(sql, io.StringIO(data))
+
+
+def _copy_value(value):
+    """Encode one value in COPY's text format (the psycopg2 path)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return (value.replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+@contextmanager
+def _explicit_timestamps(model):
+    """Let bulk_create keep the given created_at/updated_at values."""
+    saved = []
+    for field in model._meta.concrete_fields:
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+            saved.append((field, field.auto_now, field.auto_now_add))
+            field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -1,6 +1,38 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from urllib.parse import urlencode
+from unittest import mock, skipUnless
+
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Count, F
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
+from blogapi.db_metrics import database_connection_stats
+from blogapi.metrics import registry
+from blogapi.sql_instrumentation import QueryRecorder
+from blogapi.db_routing import (
+    PIN_CACHE_KEY, PIN_COOKIE, PrimaryReplicaRouter, _replica_reads, replica_reads,
+)
+from users.auth import ProfileTokenObtainPairSerializer, _local_users
+from users.models import UserProfile
+
+from .autocomplete import DEFAULT_LIMIT, suggestion_cache, suggestion_queryset
+from .benchmarks import check_budgets, load_baseline, run_benchmarks
+from .caching import get_content_version, response_cache_stats
+from .importing import import_articles
+from .models import MAX_THREAD_DEPTH, Article, ArticleTag, Comment, PostUserLikes, Tag
+from .pagination import ApproximateCountPaginator, ThreadPagination
+from .synthetic import generate_dataset
 
 
 class BlogApiFlowTests(APITestCase):
@@ -134,3 +166,1333 @@ class ArticleSlugAndToggleLikeTests(APITestCase):
         res3 = self.client.post(f"/api/articles/{article_id}/toggle-like/")
         self.assertEqual(res3.status_code, status.HTTP_200_OK, res3.data)
         self.assertEqual(res3.data["liked"], False)
+
+
+class LikesCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="liker", password="P@ssw0rd!")
+        self.other = User.objects.create_user(
+            username="liker2", password="P@ssw0rd!")
+        self.article = Article.objects.create(
+            author=self.user, title="Counted", content="Body")
+
+    def test_like_create_and_unlike_keep_counter_in_sync(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.post("/api/post-user-likes/",
+                               {"article": self.article.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        like_id = res.data["id"]
+
+        self.client.force_authenticate(self.other)
+        self.client.post("/api/post-user-likes/",
+                         {"article": self.article.id}, format="json")
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 2)
+
+        res = self.client.get(f"/api/articles/{self.article.id}/")
+        self.assertEqual(res.data["likes_count"], 2)
+
+        res = self.client.delete(
+            f"/api/post-user-likes/by-article/{self.article.id}/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        # unliking twice is idempotent and must not drift the counter
+        self.client.delete(
+            f"/api/post-user-likes/by-article/{self.article.id}/")
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 1)
+
+        self.client.force_authenticate(self.user)
+        res = self.client.delete(f"/api/post-user-likes/{like_id}/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 0)
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        stale = Article.objects.get(pk=self.article.pk)
+        PostUserLikes.objects.create(
+            user=self.other.userprofile, article=self.article)
+        Article.objects.filter(pk=self.article.pk).update(likes_count=1)
+        Comment.objects.create(
+            article=self.article, author=self.other, content="First")
+
+        stale.title = "Renamed"
+        stale.save()
+        self.client.force_authenticate(self.user)
+        res = self.client.patch(f"/api/articles/{self.article.id}/",
+                                {"content": "Edited"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.article.refresh_from_db()
+        self.assertEqual(
+            (self.article.title, self.article.content,
+             self.article.likes_count, self.article.comments_count),
+            ("Renamed", "Edited", 1, 1))
+
+    def test_search_vector_is_neither_loaded_nor_written_back(self):
+        self.client.force_authenticate(self.user)  # no anonymous cache hit
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/articles/")
+        select = next(q["sql"] for q in ctx.captured_queries
+                      if 'FROM "articles_article"' in q["sql"] and "COUNT" not in q["sql"])
+        self.assertNotIn("search_vector", select)
+
+        article = Article.objects.get(pk=self.article.pk)
+        article.title = "Renamed"
+        with CaptureQueriesContext(connection) as ctx:
+            article.save()
+        update = next(q["sql"] for q in ctx.captured_queries
+                      if q["sql"].startswith('UPDATE "articles_article"'))
+        self.assertNotIn("search_vector", update)
+
+    def test_recount_likes_command_repairs_drift(self):
+        PostUserLikes.objects.create(
+            user=self.user.userprofile, article=self.article)
+        Article.objects.filter(pk=self.article.pk).update(likes_count=7)
+
+        call_command("recount_likes", stdout=StringIO())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 1)
+
+    def test_recount_likes_dry_run_only_reports(self):
+        Article.objects.filter(pk=self.article.pk).update(likes_count=7)
+
+        out = StringIO()
+        call_command("recount_likes", "--dry-run", stdout=out)
+        self.assertIn(f"Article<{self.article.pk}>: stored=7 actual=0",
+                      out.getvalue())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 7)
+
+
+class ViewerStateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="viewer", password="P@ssw0rd!")
+        self.articles = [
+            Article.objects.create(
+                author=self.user, title=f"Article {i}", content="Body")
+            for i in range(12)
+        ]
+        for article in self.articles[::2]:
+            PostUserLikes.objects.create(
+                user=self.user.userprofile, article=article)
+
+    def _list_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(f"/api/articles/?page_size={page_size}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, ctx.captured_queries
+
+    def test_user_liked_resolved_with_one_query_per_page(self):
+        self.client.force_authenticate(self.user)
+        self._list_queries(10)  # warm the cached row count
+        res_small, small = self._list_queries(2)
+        res_large, large = self._list_queries(10)
+        self.assertEqual(len(small), len(large))
+
+        like_queries = [
+            q for q in large if "articles_postuserlikes" in q["sql"]]
+        self.assertEqual(len(like_queries), 1)
+
+        liked = {a.id for a in self.articles[::2]}
+        for row in res_large.data["results"]:
+            self.assertEqual(row["user_liked"], row["id"] in liked)
+
+    def test_user_liked_on_retrieve_and_for_anonymous(self):
+        article = self.articles[0]
+        res = self.client.get(f"/api/articles/{article.id}/")
+        self.assertFalse(res.data["user_liked"])
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(f"/api/articles/{article.id}/")
+        self.assertTrue(res.data["user_liked"])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="pager", password="P@ssw0rd!")
+        self.articles = [
+            Article.objects.create(
+                author=self.user, title=f"Article {i}", content="Body")
+            for i in range(7)
+        ]
+        # ties on likes_count must still page deterministically
+        for i, article in enumerate(self.articles):
+            Article.objects.filter(pk=article.pk).update(likes_count=i % 2)
+
+    def _walk(self, url):
+        ids = []
+        res = self.client.get(url)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+            self.assertNotIn("count", res.data)
+            ids.extend(row["id"] for row in res.data["results"])
+            if not res.data["next"]:
+                return ids
+            res = self.client.get(res.data["next"])
+
+    def test_cursor_walk_matches_page_number_order(self):
+        for ordering in ("-created_at", "created_at", "-likes_count", "title"):
+            expected = [
+                row["id"] for row in self.client.get(
+                    f"/api/articles/?ordering={ordering}&page_size=50"
+                ).data["results"]
+            ]
+            walked = self._walk(
+                f"/api/articles/?ordering={ordering}&page_size=3&cursor=")
+            self.assertEqual(walked, expected, ordering)
+
+    def test_comments_cursor_and_invalid_cursor(self):
+        article = self.articles[0]
+        for i in range(5):
+            Comment.objects.create(
+                article=article, author=self.user, content=f"c{i}")
+        walked = self._walk(
+            f"/api/comments/?article={article.id}&page_size=2&cursor=")
+        self.assertEqual(
+            walked,
+            list(Comment.objects.filter(article=article)
+                 .order_by("-created_at", "-id").values_list("id", flat=True)),
+        )
+
+        res = self.client.get("/api/comments/?cursor=bogus")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ApproximateCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="counter", password="P@ssw0rd!")
+        self.articles = [
+            Article.objects.create(
+                author=self.user, title=f"Article {i}", content="Body")
+            for i in range(4)
+        ]
+
+    def test_unfiltered_list_uses_estimate_above_threshold(self):
+        with mock.patch.object(
+                ApproximateCountPaginator, "exact_count_threshold", 3):
+            res = self.client.get("/api/articles/")
+            self.assertEqual(res.data["count"], 4)
+            self.assertTrue(res.data["count_is_approximate"])
+
+            # served from cache: no COUNT(*) on the second request
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get("/api/articles/")
+            self.assertFalse(
+                any("COUNT(" in q["sql"].upper() for q in ctx.captured_queries))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Article.objects.create(
+                    author=self.user, title="Another", content="Body")
+            res = self.client.get("/api/articles/")
+            self.assertEqual(res.data["count"], 5)
+
+    def test_filtered_and_small_lists_are_exact(self):
+        with mock.patch.object(
+                ApproximateCountPaginator, "exact_count_threshold", 3):
+            res = self.client.get("/api/articles/?search=Article")
+            self.assertEqual(res.data["count"], 4)
+            self.assertFalse(res.data["count_is_approximate"])
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get("/api/articles/")
+        self.assertEqual(res.data["count"], 4)
+        self.assertFalse(res.data["count_is_approximate"])
+        self.assertEqual(
+            sum("COUNT(" in q["sql"].upper() for q in ctx.captured_queries), 1)
+
+    def test_estimate_does_not_decide_which_pages_exist(self):
+        def get(page, estimate):
+            cache.clear()  # neither the cached count nor a cached response
+            with mock.patch("articles.pagination.row_count_estimate",
+                            return_value=(estimate, False)), \
+                    mock.patch.object(ApproximateCountPaginator,
+                                      "exact_count_threshold", 2):
+                return self.client.get(f"/api/articles/?page_size=2&page={page}")
+
+        # too low: the real last page is still served and linked
+        res = get(1, 2)
+        self.assertEqual((res.data["count"], len(res.data["results"])), (2, 2))
+        self.assertIn("page=2", res.data["next"])
+        res = get(2, 2)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["next"])
+
+        # too high: no link to, or page for, rows that do not exist
+        self.assertIsNone(get(2, 100).data["next"])
+        self.assertEqual(get(3, 100).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ArticleSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="searcher", password="P@ssw0rd!")
+        self.in_content = Article.objects.create(
+            author=self.user, title="Weekly notes", content="Tuning postgres")
+        self.in_title = Article.objects.create(
+            author=self.user, title="Postgres tuning", content="Notes")
+        Article.objects.create(
+            author=self.user, title="Unrelated", content="Nothing here")
+
+    def test_search_matches_title_and_content(self):
+        res = self.client.get("/api/articles/?search=postgres")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {row["id"] for row in res.data["results"]},
+            {self.in_content.id, self.in_title.id},
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "full-text search needs PostgreSQL")
+    def test_full_text_search_ranks_title_above_content(self):
+        res = self.client.get("/api/articles/?search=postgres")
+        self.assertEqual(
+            [row["id"] for row in res.data["results"]],
+            [self.in_title.id, self.in_content.id],
+        )
+
+        Article.objects.filter(pk=self.in_content.pk).update(
+            content="Nothing about databases")
+        Article.objects.filter(pk=self.in_content.pk).update_search_vector()
+        cache.clear()  # update() leaves the content version alone
+        res = self.client.get("/api/articles/?search=postgres")
+        self.assertEqual(
+            [row["id"] for row in res.data["results"]], [self.in_title.id])
+
+
+class AutocompleteTests(APITestCase):
+    def setUp(self):
+        suggestion_cache.clear()
+        self.user = User.objects.create_user(
+            username="typist", password="P@ssw0rd!")
+        self.match = Article.objects.create(
+            author=self.user, title="Django tips", content="Long body")
+        Article.objects.create(
+            author=self.user, title="Flask tips", content="Long body")
+
+    def test_returns_compact_prefix_matches(self):
+        res = self.client.get("/api/articles/autocomplete/?q=djan")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{
+            "id": self.match.id, "slug": self.match.slug, "title": "Django tips",
+        }])
+        self.assertEqual(self.client.get(
+            "/api/articles/autocomplete/?q=").data, [])
+
+    def test_recent_prefixes_are_cached_until_articles_change(self):
+        self.client.get("/api/articles/autocomplete/?q=dj")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/articles/autocomplete/?q=DJ")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        Article.objects.create(
+            author=self.user, title="Django ORM", content="Body")
+        res = self.client.get("/api/articles/autocomplete/?q=dj")
+        self.assertEqual(len(res.data), 2)
+
+    def test_prefix_wildcards_are_literal(self):
+        Article.objects.create(
+            author=self.user, title="50% off", content="Body")
+        res = self.client.get("/api/articles/autocomplete/?q=5%25")
+        self.assertEqual(res.data, [])
+        res = self.client.get("/api/articles/autocomplete/?q=50%25")
+        self.assertEqual([row["title"] for row in res.data], ["50% off"])
+
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm needs PostgreSQL")
+    def test_prefix_and_fuzzy_match_use_the_trigram_index(self):
+        # Both OR branches must be index-servable; with sequential scans
+        # disabled the plan may only read title through the GIN index.
+        qs = suggestion_queryset("djan")[:DEFAULT_LIMIT]
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                plan = qs.explain()
+            finally:
+                cursor.execute("RESET enable_seqscan")
+        self.assertIn("BitmapOr", plan)
+        self.assertEqual(plan.count("Bitmap Index Scan on articles_article_title_trgm"), 2)
+        self.assertNotIn("Seq Scan", plan)
+
+
+class AnonymousResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="cached", password="P@ssw0rd!")
+        self.article = Article.objects.create(
+            author=self.user, title="Cached", content="Body")
+
+    def test_anonymous_reads_hit_cache_until_a_write(self):
+        url = f"/api/articles/{self.article.id}/"
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        before = response_cache_stats()
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(response_cache_stats()["hits"], before["hits"] + 1)
+
+        # query params are normalized: order does not matter
+        self.client.get("/api/articles/?ordering=title&page_size=5")
+        res = self.client.get("/api/articles/?page_size=5&ordering=title")
+        self.assertEqual(res["X-Cache"], "HIT")
+
+        # the version is bumped when the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            PostUserLikes.objects.create(
+                user=self.user.userprofile, article=self.article)
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_version_is_bumped_when_the_write_commits(self):
+        before = get_content_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                article=self.article, author=self.user, content="New")
+            # a reader inside the write's transaction window must not be
+            # able to cache old rows under the new version
+            self.assertEqual(get_content_version(), before)
+        self.assertNotEqual(get_content_version(), before)
+
+    def test_comment_list_cached_and_authenticated_reads_bypass(self):
+        url = f"/api/comments/?article={self.article.id}"
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                article=self.article, author=self.user, content="New")
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["count"], 1)
+
+        self.client.force_authenticate(self.user)
+        self.assertNotIn("X-Cache", self.client.get(url))
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="etag", password="P@ssw0rd!")
+        self.article = Article.objects.create(
+            author=self.user, title="Conditional", content="Body")
+        self.comment = Comment.objects.create(
+            article=self.article, author=self.user, content="First")
+
+    def test_article_detail_not_modified_until_liked(self):
+        url = f"/api/articles/{self.article.id}/"
+        res = self.client.get(url)
+        etag = res["ETag"]
+        self.assertIn("Last-Modified", res)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        PostUserLikes.objects.create(
+            user=self.user.userprofile, article=self.article)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertTrue(res.data["user_liked"])
+
+    def test_comment_list_not_modified_until_comment_changes(self):
+        url = f"/api/comments/?article={self.article.id}"
+        etag = self.client.get(url)["ETag"]
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # a different page is a different representation
+        res = self.client.get(url + "&page_size=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.comment.content = "Edited"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.comment.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["content"], "Edited")
+
+
+class SlugAllocationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="slugger", password="P@ssw0rd!")
+
+    def _create(self, title="Weekly update"):
+        return Article.objects.create(author=self.user, title=title)
+
+    def test_next_suffix_found_with_one_query(self):
+        slugs = [self._create().slug for _ in range(3)]
+        self.assertEqual(
+            slugs, ["weekly-update", "weekly-update-2", "weekly-update-3"])
+        self._create("Weekly update 7")  # "weekly-update-7" is taken too
+
+        with CaptureQueriesContext(connection) as ctx:
+            slug = Article(title="Weekly update")._build_unique_slug()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(slug, "weekly-update-8")
+
+    def test_bulk_allocation_for_shared_bases(self):
+        self._create()
+        batch = [Article(author=self.user, title=t) for t in
+                 ("Weekly update", "Weekly update", "Fresh title")]
+        with CaptureQueriesContext(connection) as ctx:
+            Article.objects.allocate_slugs(batch)
+        self.assertEqual(len(ctx.captured_queries), 2)  # one per base
+        self.assertEqual(
+            [a.slug for a in batch],
+            ["weekly-update-2", "weekly-update-3", "fresh-title"])
+        Article.objects.bulk_create(batch)
+
+    def test_save_retries_when_slug_taken_concurrently(self):
+        self._create()
+        with mock.patch.object(
+            Article, "_build_unique_slug",
+            side_effect=["weekly-update", "weekly-update-2"],
+        ):
+            article = self._create()
+        self.assertEqual(article.slug, "weekly-update-2")
+
+
+class BulkImportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="importer", password="P@ssw0rd!", is_staff=True)
+        self.body = "\n".join([
+            json.dumps({"title": "Imported", "content": "One"}),
+            json.dumps({"title": "Imported", "content": "Two"}),
+            "not json",
+            json.dumps({"content": "missing title"}),
+            "",
+            json.dumps({"title": "Other", "content": "Three"}),
+        ])
+
+    def test_admin_endpoint_streams_batches_and_reports_rejects(self):
+        self.client.force_authenticate(self.admin)
+        res = self.client.post(
+            "/api/articles/bulk-import/?batch_size=2", self.body,
+            content_type="application/x-ndjson")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(res.data["imported"], 3)
+        self.assertEqual(res.data["rejected"], 2)
+        self.assertEqual([e["line"] for e in res.data["errors"]], [3, 4])
+        self.assertEqual(
+            sorted(Article.objects.values_list("slug", flat=True)),
+            ["imported", "imported-2", "other"])
+
+    def test_import_lines_with_tags(self):
+        django, python = Tag.objects.create(name="django"), Tag.objects.create(name="python")
+        body = "\n".join([
+            json.dumps({"title": "Both", "tags": [django.pk, python.pk, django.pk]}),
+            json.dumps({"title": "One", "tags": [python.pk]}),
+            json.dumps({"title": "Unknown", "tags": [python.pk, python.pk + 100]}),
+            json.dumps({"title": "None"}),
+        ])
+        result = import_articles(body.splitlines(), self.admin)
+        self.assertEqual((result.imported, result.rejected), (3, 1))
+        self.assertEqual(result.errors[0]["line"], 3)
+        self.assertIn("tags", result.errors[0]["errors"])
+        tagged = {
+            a.title: sorted(t.name for t in a.tags.all())
+            for a in Article.objects.prefetch_related("tags")}
+        self.assertEqual(tagged, {
+            "Both": ["django", "python"], "One": ["python"], "None": []})
+        self.assertEqual(
+            dict(Tag.objects.values_list("name", "articles_count")),
+            {"django": 1, "python": 2})
+
+    def test_non_admin_cannot_bulk_import(self):
+        user = User.objects.create_user(username="plain", password="P@ssw0rd!")
+        self.client.force_authenticate(user)
+        res = self.client.post(
+            "/api/articles/bulk-import/", self.body,
+            content_type="application/x-ndjson")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as fh:
+            fh.write(self.body)
+        self.addCleanup(os.remove, fh.name)
+        out = StringIO()
+        call_command("import_articles", fh.name, author="importer",
+                     batch_size=4, stdout=out, stderr=StringIO())
+        self.assertIn("Imported 3 article(s), rejected 2", out.getvalue())
+        self.assertEqual(Article.objects.filter(author=self.admin).count(), 3)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username="analyst", password="P@ssw0rd!", is_staff=True)
+        self.old = Article.objects.create(
+            author=self.staff, title="Old", content="Body")
+        Article.objects.filter(pk=self.old.pk).update(
+            created_at=timezone.now() - timedelta(days=10))
+        self.new = Article.objects.create(
+            author=self.staff, title="New", content="Body")
+        self.comment = Comment.objects.create(
+            article=self.new, author=self.staff, content="c")
+        self.client.force_authenticate(self.staff)
+        self.client.post("/api/post-user-likes/",
+                         {"article": self.new.id}, format="json")
+
+    def _rows(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        body = b"".join(res.streaming_content).decode("utf-8")
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_articles_export_with_counts_and_since(self):
+        rows = self._rows("/api/export/articles/")
+        self.assertEqual([r["id"] for r in rows], [self.old.id, self.new.id])
+        self.assertEqual(rows[1]["likes_count"], 1)
+        self.assertEqual(rows[1]["comments_count"], 1)
+
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        rows = self._rows(f"/api/export/articles/?since={since}")
+        self.assertEqual([r["id"] for r in rows], [self.new.id])
+
+    def test_comments_likes_and_errors(self):
+        reply = Comment.objects.create(
+            article=self.new, author=self.staff, content="r", parent=self.comment)
+        rows = self._rows("/api/export/comments/")
+        self.assertEqual(
+            [(r["id"], r["parent_id"], r["path"]) for r in rows],
+            [(self.comment.id, None, self.comment.path),
+             (reply.id, self.comment.id, reply.path)])
+        self.assertEqual(
+            self._rows("/api/export/likes/")[0]["article_id"], self.new.id)
+        self.assertEqual(self.client.get(
+            "/api/export/tags/").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(
+            "/api/export/likes/?since=yesterday").status_code,
+            status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(
+            User.objects.create_user(username="nosy", password="P@ssw0rd!"))
+        self.assertEqual(self.client.get(
+            "/api/export/articles/").status_code, status.HTTP_403_FORBIDDEN)
+
+
+class LikeBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="batcher", password="P@ssw0rd!")
+        self.articles = [
+            Article.objects.create(
+                author=self.user, title=f"Article {i}", content="Body")
+            for i in range(4)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def test_batch_like_unlike_and_liked_ids(self):
+        a, b, c, d = (x.id for x in self.articles)
+        self.client.post("/api/post-user-likes/", {"article": a}, format="json")
+
+        res = self.client.post(
+            "/api/post-user-likes/batch/",
+            {"like": [a, b, c, 999999], "unlike": []}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual(res.data["liked"], [b, c])
+
+        res = self.client.get("/api/post-user-likes/liked-ids/")
+        self.assertEqual(res.data, [a, b, c])
+        res = self.client.get(f"/api/post-user-likes/liked-ids/?articles={b},{d}")
+        self.assertEqual(res.data, [b])
+
+        res = self.client.post(
+            "/api/post-user-likes/batch/",
+            {"like": [d], "unlike": [a, b]}, format="json")
+        self.assertEqual(res.data, {"liked": [d], "unliked": [a, b]})
+        self.assertEqual(
+            dict(Article.objects.values_list("id", "likes_count")),
+            {a: 0, b: 0, c: 1, d: 1})
+
+    def test_liked_ids_is_a_single_query_without_article_rows(self):
+        PostUserLikes.objects.create(
+            user=self.user.userprofile, article=self.articles[0])
+        # The profile id comes from the token claim; no profile lookup.
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.force_authenticate(self.user, token=token)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get("/api/post-user-likes/liked-ids/")
+        self.assertEqual(res.data, [self.articles[0].id])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("articles_article", ctx.captured_queries[0]["sql"])
+
+    def test_rejects_overlapping_like_and_unlike(self):
+        a = self.articles[0].id
+        res = self.client.post(
+            "/api/post-user-likes/batch/",
+            {"like": [a], "unlike": [a]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncReadEndpointTests(APITransactionTestCase):
+    # The async views query from the loop's thread pool on their own
+    # connections, so test data has to be committed.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="asyncer", password="P@ssw0rd!")
+        self.articles = [
+            Article.objects.create(
+                author=self.user, title=f"Async {i}", content="Body")
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            article=self.articles[0], author=self.user, content="First")
+        self.access = str(
+            ProfileTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def test_list_and_detail_match_sync_endpoints(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.client.post("/api/post-user-likes/",
+                         {"article": self.articles[1].id}, format="json")
+
+        sync = self.client.get("/api/articles/?page_size=2&ordering=title").json()
+        res = self.client.get("/api/async/articles/?page_size=2&ordering=title")
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual(data["results"], sync["results"])
+        self.assertEqual(data["count"], 3)
+        self.assertIn("page=2", data["next"])
+        self.assertEqual([a["user_liked"] for a in data["results"]], [False, True])
+
+        pk = self.articles[1].id
+        sync = self.client.get(f"/api/articles/{pk}/")
+        res = self.client.get(f"/api/async/articles/{pk}/")
+        self.assertEqual(res.json(), sync.json())
+        self.assertEqual(res["ETag"], sync["ETag"])
+        res = self.client.get(f"/api/async/articles/{pk}/",
+                              HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.client.get("/api/async/articles/999999/").status_code, 404)
+
+    def test_comment_list_and_conditional_get(self):
+        url = f"/api/async/comments/?article={self.articles[0].id}"
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["results"], self.client.get(
+            f"/api/comments/?article={self.articles[0].id}").json()["results"])
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=res["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get("/api/async/comments/?article=x").status_code, 400)
+
+    def test_tag_filter(self):
+        a, b, _ = self.articles
+        python, rare = (Tag.objects.create(name=n) for n in ("python", "rare"))
+        a.tags.add(python, rare)
+        b.tags.add(python)
+        res = self.client.get("/api/async/articles/?tag=Python,rare&tag_match=all")
+        self.assertEqual([row["id"] for row in res.json()["results"]], [a.id])
+        self.assertEqual(res.json()["results"][0]["tag_names"], ["python", "rare"])
+
+    def test_reads_only_and_bad_tokens_rejected(self):
+        self.assertEqual(self.client.post("/api/async/articles/").status_code, 405)
+        res = self.client.get("/api/async/articles/", HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(res.status_code, 401)
+        self.assertIn("WWW-Authenticate", res)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_use_replicas_only_inside_replica_reads(self):
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(Article))
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Article), "replica_1")
+            self.assertEqual(router.db_for_write(Article), "default")
+        self.assertIsNone(router.db_for_read(Article))
+        self.assertFalse(router.allow_migrate("replica_1", "articles"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaReadViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="replicas", password="P@ssw0rd!")
+        self.article = Article.objects.create(author=self.user, title="R", content="x")
+        self.client.force_authenticate(self.user)
+
+    def _replica_flags(self, method, path, data=None):
+        flags = []
+
+        def record(router, model, **hints):
+            flags.append(_replica_reads.get())
+
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", record):
+            getattr(self.client, method)(path, data, format="json")
+        return flags
+
+    def test_safe_requests_read_from_replica_until_user_writes(self):
+        self.assertTrue(any(self._replica_flags("get", "/api/articles/")))
+        self.assertTrue(any(self._replica_flags(
+            "get", f"/api/comments/?article={self.article.id}")))
+        self.assertFalse(any(self._replica_flags(
+            "post", "/api/comments/", {"article": self.article.id, "content": "hi"})))
+
+        # The writer is pinned to the primary for REPLICA_PIN_SECONDS, by
+        # the signed cookie even where the cache entry is not visible.
+        self.assertFalse(any(self._replica_flags("get", "/api/articles/")))
+        cache.delete(PIN_CACHE_KEY.format(self.user.pk))
+        self.assertFalse(any(self._replica_flags("get", "/api/articles/")))
+        del self.client.cookies[PIN_COOKIE]
+        self.assertTrue(any(self._replica_flags("get", "/api/articles/")))
+
+        # an unsigned value does not count
+        self.client.cookies[PIN_COOKIE] = str(self.user.pk)
+        self.assertTrue(any(self._replica_flags("get", "/api/articles/")))
+
+    def test_anonymous_cache_fills_read_from_primary(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(set(self._replica_flags("get", "/api/articles/")), {False})
+        self.assertEqual(self.client.get("/api/articles/")["X-Cache"], "HIT")
+
+
+class DatabaseConnectionStatsTests(SimpleTestCase):
+    def test_counts_opened_connections_per_alias(self):
+        before = database_connection_stats()["default"]
+        connection_created.send(sender=type(connection), connection=connection)
+        after = database_connection_stats()["default"]
+        self.assertEqual(after["connections_opened"], before["connections_opened"] + 1)
+        for max_age, mode in ((0, "per-request"), (60, "persistent")):
+            with mock.patch.dict(connection.settings_dict, {"CONN_MAX_AGE": max_age}):
+                self.assertEqual(database_connection_stats()["default"]["mode"], mode)
+
+
+class SyntheticDatasetTests(APITestCase):
+    def test_generates_consistent_deterministic_data(self):
+        result = generate_dataset(20, 50, 200, 300, seed=7, prefix="a",
+                                  batch_size=64)
+        self.assertEqual(User.objects.filter(username__startswith="a-").count(), 20)
+        self.assertEqual(UserProfile.objects.count(), 20)
+        self.assertEqual(Article.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 200)
+        likes = PostUserLikes.objects.count()
+        self.assertEqual(result.counts["articles_postuserlikes"], likes)
+        # likes_count is written with the article and matches the rows
+        self.assertFalse(Article.objects.annotate(n=Count("likes")).exclude(
+            likes_count=F("n")).exists())
+        first = list(Article.objects.order_by("pk").values_list(
+            "title", "content", "created_at", "likes_count"))
+        self.assertTrue(self.client.login(username="a-0", password="synthetic"))
+
+        generate_dataset(20, 50, 200, 300, seed=7, prefix="b", batch_size=64)
+        again = list(Article.objects.filter(slug__startswith="b-").order_by(
+            "pk").values_list("title", "content", "created_at", "likes_count"))
+        self.assertEqual(again, first)
+
+
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="pw")
+        self.article = Article.objects.create(
+            author=self.user, title="Threads", content="x")
+        self.client.force_authenticate(self.user)
+
+    def reply(self, content, parent=None, article=None):
+        res = self.client.post("/api/comments/", {
+            "article": (article or self.article).pk,
+            "parent": parent, "content": content,
+        }, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        return res.data["id"]
+
+    def test_thread_in_display_order_paged_by_top_level(self):
+        first = self.reply("first")
+        second = self.reply("second")
+        answer = self.reply("answer", parent=first)
+        self.reply("nested", parent=answer)
+        self.reply("late answer", parent=first)
+        self.reply("third")
+        self.client.force_authenticate(None)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                f"/api/comments/thread/?article={self.article.pk}&page_size=1")
+        self.assertEqual(
+            [(c["content"], c["depth"]) for c in res.data["results"]],
+            [("first", 0), ("answer", 1), ("nested", 2), ("late answer", 1)])
+        res = self.client.get(res.data["next"])
+        self.assertEqual([c["id"] for c in res.data["results"]], [second])
+        res = self.client.get(res.data["next"])
+        self.assertEqual([c["content"] for c in res.data["results"]], ["third"])
+        self.assertIsNone(res.data["next"])
+
+        res = self.client.get(f"/api/comments/{first}/replies/?page_size=1")
+        self.assertEqual([c["content"] for c in res.data["results"]],
+                         ["answer", "nested"])
+        res = self.client.get(res.data["next"])
+        self.assertEqual([c["content"] for c in res.data["results"]],
+                         ["late answer"])
+        self.assertIsNone(res.data["next"])
+
+        # a long thread is split across pages
+        with mock.patch.object(ThreadPagination, "max_page_rows", 3):
+            res = self.client.get(f"/api/comments/thread/?article={self.article.pk}")
+            self.assertEqual([c["content"] for c in res.data["results"]],
+                             ["first", "answer", "nested"])
+            res = self.client.get(res.data["next"])
+        self.assertEqual([c["content"] for c in res.data["results"]],
+                         ["late answer", "second", "third"])
+        self.assertIsNone(res.data["next"])
+
+    def test_reply_must_stay_in_its_thread(self):
+        other = Article.objects.create(author=self.user, title="Other", content="y")
+        top = self.reply("top")
+        res = self.client.post("/api/comments/", {
+            "article": other.pk, "parent": top, "content": "misplaced"},
+            format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        answer = self.reply("answer", parent=top)
+        res = self.client.patch(
+            f"/api/comments/{answer}/", {"parent": None}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        parent = top
+        for _ in range(MAX_THREAD_DEPTH - 1):
+            parent = Comment.objects.create(
+                article=self.article, author=self.user, parent_id=parent,
+                content="deeper").pk
+        res = self.client.post("/api/comments/", {
+            "article": self.article.pk, "parent": parent, "content": "too deep"},
+            format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_generated_threads_are_consistent(self):
+        generate_dataset(10, 3, 400, seed=3, prefix="t", reply_ratio=0.8)
+        replies = Comment.objects.filter(parent__isnull=False).select_related("parent")
+        self.assertGreater(replies.count(), 200)
+        for comment in replies:
+            self.assertEqual(comment.path[:-10], comment.parent.path)
+            self.assertEqual(comment.article_id, comment.parent.article_id)
+            self.assertGreaterEqual(comment.created_at, comment.parent.created_at)
+        self.assertGreater(max(c.depth for c in replies), 5)
+        # the pk sequence continues after the generated rows
+        self.assertTrue(self.reply("after"))
+
+
+class ArticleDetailWithCommentsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="pw")
+        self.article = Article.objects.create(
+            author=self.user, title="Compound", content="x")
+        self.comments = [
+            Comment.objects.create(
+                article=self.article, author=self.user, content=f"c{i}")
+            for i in range(12)
+        ]
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_comments_count_follows_creates_and_deletes(self):
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comments_count, 12)
+        reply = Comment.objects.create(
+            article=self.article, author=self.user, parent=self.comments[0],
+            content="reply")
+        Comment.objects.create(
+            article=self.article, author=self.user, parent=reply, content="deeper")
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comments_count, 14)
+
+        res = self.client.delete(
+            f"/api/comments/{self.comments[0].pk}/", **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comments_count, 11)
+
+        Article.objects.filter(pk=self.article.pk).update(comments_count=40)
+        call_command("recount_comments", stdout=StringIO())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comments_count, 11)
+
+    def test_detail_with_first_comment_page(self):
+        PostUserLikes.objects.create(
+            user=self.user.userprofile, article=self.article)
+        url = f"/api/articles/{self.article.pk}/?include=comments"
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+        self.assertFalse(res.data["user_liked"])
+        self.assertNotIn("ETag", res)
+
+        self.client.get(url, **self.auth)  # caches the user
+        with self.assertNumQueries(4):
+            res = self.client.get(url, **self.auth)
+        self.assertTrue(res.data["user_liked"])
+        self.assertEqual(res.data["comments_count"], 12)
+        first = res.data["comments"]["results"]
+        self.assertEqual([c["content"] for c in first],
+                         [f"c{i}" for i in range(11, 1, -1)])
+        rest = self.client.get(res.data["comments"]["next"])
+        self.assertEqual([c["content"] for c in rest.data["results"]], ["c1", "c0"])
+
+        plain = self.client.get(f"/api/articles/{self.article.pk}/")
+        self.assertNotIn("comments", plain.data)
+        self.assertEqual(plain.data["comments_count"], 12)
+
+    def test_article_comments_route(self):
+        res = self.client.post(
+            f"/api/articles/{self.article.pk}/comments/", {"content": "Nice!"},
+            format="json", **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(res.data["article"], self.article.pk)
+        res = self.client.get(f"/api/articles/{self.article.pk}/comments/")
+        self.assertEqual(res.data["results"][0]["content"], "Nice!")
+        self.assertIsNotNone(res.data["next"])
+
+    def test_article_comments_route_accepts_form_posts(self):
+        url = f"/api/articles/{self.article.pk}/comments/"
+        res = self.client.post(url, {"content": "Multipart"}, **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        res = self.client.post(
+            url, urlencode({"content": "Form", "parent": res.data["id"]}),
+            content_type="application/x-www-form-urlencoded", **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual((res.data["article"], res.data["depth"]), (self.article.pk, 1))
+
+        other = Article.objects.create(author=self.article.author, title="Other")
+        res = self.client.post(
+            f"/api/articles/{other.pk}/comments/",
+            {"content": "Wrong thread", "parent": res.data["id"]}, **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("parent", res.data)
+
+
+class TagTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tagger", password="pw")
+        self.other = User.objects.create_user(username="other", password="pw")
+        self.articles = [
+            Article.objects.create(
+                author=self.user, title=f"Article {i}", content="Body")
+            for i in range(4)
+        ]
+        self.django, self.python, self.rare = (
+            Tag.objects.create(name=name) for name in ("django", "python", "rare"))
+        self.client.force_authenticate(self.user)
+
+    def counts(self):
+        return dict(Tag.objects.values_list("name", "articles_count"))
+
+    def test_names_are_normalized_and_unique(self):
+        res = self.client.post("/api/tags/", {"name": "  Web   Dev "}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(res.data["name"], "web dev")
+        res = self.client.post("/api/tags/", {"name": "WEB DEV"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.delete(f"/api/tags/{self.rare.pk}/")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_articles_count_follows_tag_changes(self):
+        a, b, c, _ = self.articles
+        a.tags.add(self.django, self.python)
+        b.tags.add(self.django)
+        self.django.articles.add(c, a)  # a is already tagged
+        self.assertEqual(self.counts(), {"django": 3, "python": 1, "rare": 0})
+
+        a.tags.set([self.python, self.rare])
+        self.assertEqual(self.counts(), {"django": 2, "python": 1, "rare": 1})
+        b.tags.remove(self.python)  # not tagged with it
+        self.django.articles.clear()
+        self.assertEqual(self.counts(), {"django": 0, "python": 1, "rare": 1})
+
+        a.delete()
+        self.assertEqual(self.counts(), {"django": 0, "python": 0, "rare": 0})
+
+        c.tags.add(self.rare)
+        Tag.objects.update(articles_count=7)
+        call_command("recount_tags", stdout=StringIO())
+        self.assertEqual(self.counts(), {"django": 0, "python": 0, "rare": 1})
+
+    def test_tag_changes_invalidate_article_etags(self):
+        article = self.articles[0]
+        article.tags.add(self.django)
+        url = f"/api/articles/{article.pk}/"
+        etag = self.client.get(url)["ETag"]
+
+        staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
+        self.client.force_authenticate(staff)
+        res = self.client.patch(f"/api/tags/{self.django.pk}/", {"name": "Renamed"},
+                                format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.client.force_authenticate(self.user)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tag_names"], ["renamed"])
+
+        etag = res["ETag"]
+        self.rare.articles.add(article)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res["ETag"]
+        self.rare.delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tag_names"], ["renamed"])
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_create_article_with_tags(self):
+        res = self.client.post(
+            "/api/articles/",
+            {"title": "Tagged", "content": "Body",
+             "tags": [self.django.pk, self.python.pk]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(sorted(res.data["tag_names"]), ["django", "python"])
+        self.assertEqual(self.counts()["django"], 1)
+
+    def test_filter_by_any_and_all_tags(self):
+        a, b, c, d = self.articles
+        a.tags.add(self.django, self.python)
+        b.tags.add(self.django)
+        c.tags.add(self.python, self.rare)
+
+        def ids(query):
+            res = self.client.get(f"/api/articles/?{query}")
+            self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+            return sorted(row["id"] for row in res.data["results"])
+
+        self.assertEqual(ids("tag=Django"), [a.id, b.id])
+        self.assertEqual(ids("tag=django,rare"), [a.id, b.id, c.id])
+        self.assertEqual(ids("tag=django&tag=python&tag_match=all"), [a.id])
+        self.assertEqual(ids("tag=django,unknown&tag_match=all"), [])
+        self.assertEqual(ids("tag=unknown"), [])
+        res = self.client.get("/api/articles/?tag=django&tag_match=some")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # tag ids, count, page (+ prefetched tags); auth is forced, so no
+        # user lookup
+        self.client.logout()
+        with self.assertNumQueries(4):
+            self.client.get("/api/articles/?tag=django,python&tag_match=all")
+
+    def test_bulk_tags(self):
+        ids = [x.id for x in self.articles]
+        self.articles[0].tags.add(self.rare)
+        url = "/api/articles/bulk-tags/"
+        with self.assertNumQueries(12):
+            res = self.client.post(
+                url, {"articles": ids, "add": ["Django", "new"],
+                      "remove": ["rare"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual(res.data, {
+            "added": 8, "removed": 1, "tags": ["django", "new", "rare"]})
+        self.assertEqual(self.counts(),
+                         {"django": 4, "new": 4, "python": 0, "rare": 0})
+
+        res = self.client.post(
+            url, {"articles": ids, "add": ["new"], "remove": ["django"]},
+            format="json")
+        self.assertEqual(res.data["added"], 0)
+        self.assertEqual(res.data["removed"], 4)
+        self.assertEqual(self.counts()["new"], 4)
+
+        foreign = Article.objects.create(author=self.other, title="Theirs", content="x")
+        res = self.client.post(
+            url, {"articles": [ids[0], foreign.id], "add": ["python"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.client.post(
+            url, {"articles": ids, "add": ["x"], "remove": ["X"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_tags_ignores_unknown_articles(self):
+        missing = Article.objects.order_by("-pk").first().pk + 1
+        res = self.client.post(
+            "/api/articles/bulk-tags/",
+            {"articles": [self.articles[0].id, missing], "add": ["new"]},
+            format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual(res.data["added"], 1)
+        self.assertFalse(ArticleTag.objects.filter(article_id=missing).exists())
+        self.assertEqual(self.counts()["new"], 1)
+
+        res = self.client.post(
+            "/api/articles/bulk-tags/",
+            {"articles": [missing], "add": ["orphan"]}, format="json")
+        self.assertEqual(res.data, {"added": 0, "removed": 0, "tags": []})
+        self.assertFalse(Tag.objects.filter(name="orphan").exists())
+
+
+class EndpointBudgetTests(APITestCase):
+    """Query budgets from benchmark_baseline.json; latency is not checked."""
+
+    def test_endpoints_stay_within_query_budgets(self):
+        baseline = load_baseline()
+        if not baseline:
+            self.skipTest(f"No {connection.vendor} baseline recorded.")
+        generate_dataset(20, 100, 300, 300, prefix="bench", reply_ratio=0.5)
+        user = User.objects.get(username="bench-0")
+        # Budgets are recorded on a dataset large enough for estimated counts.
+        with mock.patch.object(ApproximateCountPaginator, "exact_count_threshold", 50):
+            results = run_benchmarks(user, "synthetic", repeat=2, warmup=1)
+        self.assertEqual(check_budgets(results, baseline, latency=False), [])
+
+    def test_command_only_seeds_scratch_databases_on_request(self):
+        def run(*args):
+            with self.assertRaisesMessage(CommandError, "") as ctx:
+                call_command("benchmark_endpoints", *args, stdout=StringIO())
+            return str(ctx.exception)
+
+        self.assertIn("--seed-dataset", run())
+        self.assertIn("DEBUG off", run("--seed-dataset"))
+        with override_settings(DEBUG=True), \
+                mock.patch.dict(connection.settings_dict, {"NAME": "blogapi"}):
+            self.assertIn("'blogapi'", run("--seed-dataset"))
+        self.assertFalse(User.objects.filter(username__startswith="bench-").exists())
+
+
+class SQLInstrumentationTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="sam", password="pw")
+        self.article = Article.objects.create(author=user, title="Timed", content="x")
+
+    def test_off_by_default(self):
+        response = self.client.get("/api/articles/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("blogapi.sql", "INFO") as logs:
+            response = self.client.get(f"/api/articles/{self.article.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries"')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            (record["route"], record["view"], record["action"]),
+            ("article-detail", "ArticleViewSet", "retrieve"))
+        self.assertGreater(record["queries"], 0)
+        self.assertNotIn("SELECT", response["Server-Timing"])
+
+    def test_recorder_flags_repeated_statements(self):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for article in Article.objects.all():
+                for _ in range(3):
+                    Comment.objects.filter(article=article).count()
+        self.assertEqual(recorder.count, 4)
+        [(sql, times)] = recorder.duplicates(threshold=3)
+        self.assertEqual(times, 3)
+        self.assertIn("articles_comment", sql)
+
+
+class MetricsEndpointTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+        # user ids repeat across tests; drop users cached by earlier ones
+        cache.clear()
+        _local_users.clear()
+        self.staff = User.objects.create_user(
+            username="ops", password="pw", is_staff=True)
+        Article.objects.create(author=self.staff, title="Measured", content="x")
+
+    def test_requires_staff_or_token(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        user = User.objects.create_user(username="plain", password="pw")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.client.logout()
+            response = self.client.get(
+                "/metrics/", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+
+    def test_records_latency_db_time_and_status_per_route(self):
+        self.client.get("/api/articles/")
+        self.client.get("/api/articles/999999/")
+        token = ProfileTokenObtainPairSerializer.get_token(self.staff).access_token
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'blogapi_http_requests_total{route="article-list",method="GET",status="200"} 1',
+            body)
+        self.assertIn(
+            'blogapi_http_requests_total{route="article-detail",method="GET",status="404"} 1',
+            body)
+        self.assertIn(
+            'blogapi_http_request_duration_seconds_count{route="article-list",method="GET"} 1',
+            body)
+        self.assertIn(
+            'blogapi_http_request_db_seconds_count{route="article-list",method="GET"} 1',
+            body)
+        self.assertNotIn(
+            'blogapi_http_request_db_seconds_sum{route="article-list",method="GET"} 0.0\n',
+            body)
+        self.assertIn("blogapi_response_cache_requests_total", body)
+        self.assertIn('blogapi_db_connections_opened_total{alias="default"}', body)
+
+
+class ProfilingTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=directory.name,
+            PROFILING_MAX_ENTRIES=2)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.staff = User.objects.create_user(
+            username="ops", password="pw", is_staff=True)
+        self.user = User.objects.create_user(username="plain", password="pw")
+        Article.objects.create(author=self.user, title="Profiled", content="x")
+
+    def _auth(self, user):
+        token = ProfileTokenObtainPairSerializer.get_token(user).access_token
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_staff_request_is_profiled(self):
+        response = self.client.get(
+            "/api/articles/", HTTP_X_PROFILE="1", **self._auth(self.staff))
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-Id"]
+
+        detail = self.client.get(f"/api/debug/profiles/{profile_id}/", **self._auth(self.staff))
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data["route"], "article-list")
+        self.assertEqual(detail.data["trigger"], "staff")
+        self.assertGreater(detail.data["sql_count"], 0)
+        self.assertTrue(detail.data["top_functions"])
+        download = self.client.get(
+            f"/api/debug/profiles/{profile_id}/download/", **self._auth(self.staff))
+        self.assertEqual(download.status_code, 200)
+
+    def test_not_profiled_without_staff_or_header(self):
+        response = self.client.get(
+            "/api/articles/?_profile=1", **self._auth(self.user))
+        self.assertNotIn("X-Profile-Id", response)
+        response = self.client.get("/api/articles/", **self._auth(self.staff))
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(
+            self.client.get("/api/debug/profiles/", **self._auth(self.user)).status_code,
+            status.HTTP_403_FORBIDDEN)
+
+    def test_keeps_newest_entries(self):
+        ids = [
+            self.client.get("/api/articles/?_profile=1", **self._auth(self.staff))
+            ["X-Profile-Id"]
+            for _ in range(3)
+        ]
+        listed = self.client.get("/api/debug/profiles/", **self._auth(self.staff)).data
+        self.assertEqual([p["id"] for p in listed], ids[:0:-1])
+        self.assertEqual(
+            self.client.get(f"/api/debug/profiles/{ids[0]}/", **self._auth(self.staff))
+            .status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.get("/api/debug/profiles/..%2Fx/", **self._auth(self.staff))
+            .status_code, status.HTTP_404_NOT_FOUND)
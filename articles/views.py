@@ -1,77 +1,174 @@
-from django.db.models import Count, Exists, OuterRef, Value, BooleanField, Q
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.db.models import BooleanField, Count, Exists, F, Max, OuterRef, Value
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth.models import User
 from rest_framework import viewsets, mixins, permissions, filters, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 
-from .models import Article, Comment, PostUserLikes
-from users.models import UserProfile
-from .serializers import ArticleSerializer, CommentSerializer, PostUserLikeSerializer
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, suggest_titles
+from .caching import AnonymousResponseCacheMixin, bump_content_version
+from .conditional import (
+    has_preconditions, make_etag, not_modified_response, query_fingerprint,
+    set_validators,
+)
+from .counts import invalidate_row_count
+from .exporting import EXPORTS, export_ndjson, parse_since
+from .filters import FullTextSearchFilter, TagFilter
+from .importing import DEFAULT_BATCH_SIZE, import_articles
+from .models import Article, Comment, PostUserLikes, Tag
+from .pagination import DefaultPagination, KeysetPagination, ThreadPagination
+from blogapi.db_routing import ReplicaReadMixin
+from users.auth import get_request_profile_id
+from .serializers import (
+    ArticleCommentSerializer, ArticleDetailSerializer, ArticleSerializer,
+    ArticleSuggestionSerializer, CommentSerializer,
+    LikeBatchSerializer, PostUserLikeSerializer, TagBatchSerializer,
+    TagSerializer, resolve_viewer_state
+)
+from .tagging import bulk_tag
 
 
-class DefaultPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 100
+ARTICLE_ORDERINGS = {
+    "created_at", "-created_at", "likes_count", "-likes_count", "title", "-title",
+}
 
 
-def _get_userprofile_for_request(request):
-    user = request.user
-    if not user or not user.is_authenticated:
-        return None
-    prof = getattr(user, "profile", None) or getattr(user, "userprofile", None)
-    if prof:
-        return prof
-    return UserProfile.objects.filter(user=user).first()
+def _adjust_likes_count(article_id, delta):
+    """
+    Atomically shift Article.likes_count by `delta` (never below zero).
+    Must run in the same transaction as the like row insert/delete.
+    """
+    qs = Article.objects.filter(pk=article_id)
+    if delta < 0:
+        qs = qs.filter(likes_count__gte=-delta)
+    qs.update(likes_count=F("likes_count") + delta)
 
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ReplicaReadMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet):
     """
-    CRUD for articles + annotated fields: likes_count, user_liked.
+    CRUD for articles + likes_count (stored column) and user_liked.
+    Viewer-specific fields are resolved per page after pagination, so the
+    queryset itself does not depend on the requesting user.
     Supports:
-      ?search=…  (title/content)
+      ?search=…  (title/content; full-text with relevance ranking on PostgreSQL)
       ?ordering=-created_at|created_at|-likes_count|likes_count|title|-title
+      ?tag=a,b[&tag_match=all]  (articles with any/all of the tags)
+      GET /articles/autocomplete/?q=…&limit=…  => [{id, slug, title}, …]
+      POST /articles/bulk-import/  (admin, JSON Lines body) => import report
+      GET|POST /articles/<id>/comments/  => the article's comments (keyset
+          pages, newest first) / add one
+      POST /articles/bulk-tags/ { "articles": [ids], "add": [names],
+          "remove": [names] }  => tag/untag many articles at once
+    Detail responses carry ETag/Last-Modified; If-None-Match is checked
+    with a single-row query before the article is loaded and serialized.
+
+    GET /articles/<id>/?include=comments also returns the first page of
+    comments under "comments" ({"next", "results"}; "next" continues at
+    /comments/?article=<id>), in a fixed 3 queries (4 when authenticated).
+    Such responses carry no validators, since the comments change
+    independently of the article.
     """
     serializer_class = ArticleSerializer
     permission_classes = [permissions.AllowAny]
+    stateless_auth_actions = ("list", "retrieve", "autocomplete", "comments")
     pagination_class = DefaultPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, FullTextSearchFilter, TagFilter]
     search_fields = ["title", "content"]
     ordering_fields = ["created_at", "title", "likes_count"]
     ordering = ["-created_at"]
 
     def get_queryset(self):
-        # likes_count
-        qs = (
-            Article.objects.all()
-            .select_related("author")
-            .prefetch_related("likes")
-            .annotate(likes_count=Count("likes", distinct=True))
-        )
-
-        # user liked
-        prof = _get_userprofile_for_request(self.request)
-        if prof is not None:
-            like_exists = PostUserLikes.objects.filter(
-                user_id=prof.id,
-                article_id=OuterRef("pk"),
-            )
-            qs = qs.annotate(user_liked=Exists(like_exists))
-        else:
-            qs = qs.annotate(user_liked=Value(
-                False, output_field=BooleanField()))
+        # likes_count is a stored column kept in sync by PostUserLikesViewSet
+        # search_vector is only read by ?search= in SQL, never serialized
+        qs = (Article.objects.defer("search_vector")
+              .select_related("author").prefetch_related("tags"))
 
         ordering = self.request.query_params.get("ordering")
-        allowed = {"created_at", "-created_at",
-                   "likes_count", "-likes_count", "title", "-title"}
-        if ordering in allowed:
+        if ordering in ARTICLE_ORDERINGS:
             qs = qs.order_by(ordering)
         else:
             qs = qs.order_by("-created_at")
 
         return qs
 
+    def retrieve(self, request, *args, **kwargs):
+        if self._include_comments():
+            return super().retrieve(request, *args, **kwargs)
+        if has_preconditions(request):
+            validators = self._detail_validators(kwargs.get(self.lookup_field))
+            if validators is not None:
+                not_modified = not_modified_response(request, *validators)
+                if not_modified is not None:
+                    return not_modified
+
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            data = response.data
+            etag = make_etag(data["id"], data["updated_at"], data["likes_count"],
+                             data["comments_count"], data["user_liked"])
+            set_validators(response, etag, parse_datetime(data["updated_at"]),
+                           vary=["Authorization"])
+        return response
+
+    def _include_comments(self):
+        return (self.action == "retrieve"
+                and self.request.query_params.get("include") == "comments")
+
+    def _detail_validators(self, pk):
+        """(etag, last_modified) for an article without loading the row."""
+        if not str(pk).isdigit():
+            return None
+        qs = Article.objects.filter(pk=pk)
+        profile_id = get_request_profile_id(self.request)
+        if profile_id is not None:
+            qs = qs.annotate(liked=Exists(PostUserLikes.objects.filter(
+                user_id=profile_id, article_id=OuterRef("pk"))))
+        else:
+            qs = qs.annotate(liked=Value(False, output_field=BooleanField()))
+        row = qs.values_list(
+            "pk", "updated_at", "likes_count", "comments_count", "liked").first()
+        if row is None:
+            return None
+        return make_etag(*row), row[1]
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get("instance")
+        if instance is not None:
+            context = kwargs.setdefault(
+                "context", self.get_serializer_context())
+            context["viewer_state"] = resolve_viewer_state(
+                get_request_profile_id(self.request), instance)
+            if self._include_comments():
+                context["comments"] = self._comment_page(instance).data
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_class(self):
+        if self._include_comments():
+            return ArticleDetailSerializer
+        return super().get_serializer_class()
+
+    def _comment_page(self, article):
+        """
+        A keyset page of the article's comments, newest first, read along
+        the (article, created_at) index; "next" links to /comments/.
+        """
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(
+            Comment.objects.filter(article=article).order_by("-created_at"),
+            self.request)
+        data = CommentSerializer(page, many=True).data
+        response = paginator.get_paginated_response(data)
+        if response.data["next"]:
+            comments_url = self.request.build_absolute_uri(
+                f"{reverse('comment-list')}?article={article.pk}")
+            response.data["next"] = paginator.get_next_link(comments_url)
+        return response
+
     def perform_create(self, serializer):
         user = self.request.user
         if not user or not user.is_authenticated:
@@ -91,15 +188,114 @@ class ArticleViewSet(viewsets.ModelViewSet):
             raise permissions.PermissionDenied("Not allowed")
         instance.delete()
 
+    @action(detail=True, methods=["get", "post"],
+            permission_classes=[permissions.IsAuthenticatedOrReadOnly])
+    def comments(self, request, pk=None):
+        article = self.get_object()
+        if request.method == "GET":
+            return self._comment_page(article)
+        serializer = ArticleCommentSerializer(
+            data=request.data,
+            context={**self.get_serializer_context(), "article": article})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(article=article, author=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], url_path="autocomplete",
+            serializer_class=ArticleSuggestionSerializer, pagination_class=None)
+    def autocomplete(self, request):
+        """
+        GET /api/articles/autocomplete/?q=<prefix>
+        Title suggestions for the search box (id, slug, title only).
+        """
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        limit = max(1, min(limit, MAX_LIMIT))
+        rows = suggest_titles(
+            request.query_params.get("q", ""), limit=limit,
+            using=self.get_queryset().db)
+        return Response(rows)
+
+
+    @action(detail=False, methods=["post"], url_path="bulk-import",
+            permission_classes=[permissions.IsAdminUser])
+    def bulk_import(self, request):
+        """
+        POST /api/articles/bulk-import/?batch_size=<n>
+        Body: JSON Lines, one {"title", "content", "tags"} object per line
+        ("tags" optional, a list of tag ids). The body
+        is streamed (never parsed as a whole) and inserted in batches.
+        """
+        try:
+            batch_size = int(request.query_params.get(
+                "batch_size", DEFAULT_BATCH_SIZE))
+        except ValueError:
+            batch_size = DEFAULT_BATCH_SIZE
+        batch_size = max(1, min(batch_size, 10_000))
+        # Iterate the underlying HttpRequest so DRF never buffers the body.
+        result = import_articles(request._request, request.user, batch_size)
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED)
 
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"], url_path="bulk-tags",
+            serializer_class=TagBatchSerializer,
+            permission_classes=[permissions.IsAuthenticated])
+    def bulk_tags(self, request):
+        """
+        POST /api/articles/bulk-tags/ { "articles": [ids], "add": [names], "remove": [names] }
+        Adds the "add" tags (created if missing) to every listed article and
+        removes the "remove" tags, in a fixed number of queries. Non-staff
+        users may only tag their own articles; unknown ids are ignored.
+        """
+        ser = TagBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        article_ids = set(ser.validated_data["articles"])
+        if not request.user.is_staff and Article.objects.filter(
+                pk__in=article_ids).exclude(author=request.user).exists():
+            raise PermissionDenied("Not allowed")
+        result = bulk_tag(
+            article_ids, ser.validated_data["add"], ser.validated_data["remove"])
+        return Response(result.as_dict())
+
+
+class CommentViewSet(ReplicaReadMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet):
     """
     CRUD for comments; filter by article with ?article=<id>
+    Per-article lists carry ETag/Last-Modified from the comment count and
+    latest update, so unchanged threads are answered with 304.
+
+    Threads (POST with "parent" to reply):
+      GET /comments/thread/?article=<id>   => the article's comments in
+          display order, each with its depth, paged by top-level comment
+          (at most 500 rows a page)
+      GET /comments/<id>/replies/          => every reply below a comment,
+          paged by direct reply
+    Follow "next" for further pages.
     """
+    response_cache_actions = ("list", "thread", "replies")
+    stateless_auth_actions = ("list", "retrieve", "thread", "replies")
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     pagination_class = DefaultPagination
 
+    def list(self, request, *args, **kwargs):
+        article_id = request.query_params.get("article")
+        if not article_id or not article_id.isdigit():
+            return super().list(request, *args, **kwargs)
+
+        state = Comment.objects.filter(article_id=article_id).aggregate(
+            count=Count("pk"), last_modified=Max("updated_at"))
+        etag = make_etag(article_id, query_fingerprint(request),
+                         state["count"], state["last_modified"])
+        not_modified = not_modified_response(
+            request, etag, state["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, state["last_modified"])
+
     def get_queryset(self):
         qs = Comment.objects.select_related(
             "author", "article").order_by("-created_at")
@@ -127,6 +323,52 @@ class CommentViewSet(viewsets.ModelViewSet):
             raise permissions.PermissionDenied("Not allowed")
         instance.delete()
 
+    @action(detail=False, methods=["get"], pagination_class=ThreadPagination)
+    def thread(self, request):
+        return self._cached_response(self._thread, request)
+
+    @action(detail=True, methods=["get"], pagination_class=ThreadPagination)
+    def replies(self, request, pk=None):
+        return self._cached_response(self._replies, request, pk=pk)
+
+    def _thread(self, request):
+        article_id = request.query_params.get("article")
+        if not article_id or not article_id.isdigit():
+            raise ValidationError({"article": ["Expected an article id."]})
+        return self._paginated(Comment.objects.thread(article_id))
+
+    def _replies(self, request, pk=None):
+        comment = self.get_object()
+        self.thread_parent = comment.pk
+        return self._paginated(Comment.objects.subtree(comment))
+
+    def _paginated(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class TagViewSet(ReplicaReadMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet):
+    """
+    Tags with their stored articles_count (no per-request GROUP BY).
+      ?ordering=name|-name|articles_count|-articles_count  (default name)
+    Anyone may read, authenticated users may create; renaming and
+    deleting are staff-only.
+    """
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth_actions = ("list", "retrieve")
+    pagination_class = DefaultPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["name", "articles_count"]
+    ordering = ["name"]
+
+    def get_permissions(self):
+        if self.action in ("update", "partial_update", "destroy"):
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
 
 class PostUserLikesViewSet(
     mixins.ListModelMixin,
@@ -141,6 +383,8 @@ class PostUserLikesViewSet(
       - POST { "article": <id> }               => like (unique per user+article)
       - DELETE /post-user-likes/{id}/          => unlike by like-row id
       - DELETE /post-user-likes/by-article/<article_id>/ => unlike by article id (current user)
+      - GET /post-user-likes/liked-ids/[?articles=1,2,3] => [article ids the current user liked]
+      - POST /post-user-likes/batch/ { "like": [ids], "unlike": [ids] } => bulk like/unlike
     """
     serializer_class = PostUserLikeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -153,10 +397,10 @@ class PostUserLikesViewSet(
         article_id = self.request.query_params.get("article")
 
         if mine:
-            prof = _get_userprofile_for_request(self.request)
-            if prof is None:
+            profile_id = get_request_profile_id(self.request)
+            if profile_id is None:
                 return PostUserLikes.objects.none()
-            qs = qs.filter(user_id=prof.id)
+            qs = qs.filter(user_id=profile_id)
 
         if article_id:
             qs = qs.filter(article_id=article_id)
@@ -164,10 +408,18 @@ class PostUserLikesViewSet(
         return qs
 
     def perform_create(self, serializer):
-        prof = _get_userprofile_for_request(self.request)
-        if prof is None:
+        profile_id = get_request_profile_id(self.request)
+        if profile_id is None:
             raise permissions.PermissionDenied("Authentication required")
-        serializer.save(user=prof)
+        with transaction.atomic():
+            like = serializer.save(user_id=profile_id)
+            _adjust_likes_count(like.article_id, +1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted, _ = PostUserLikes.objects.filter(pk=instance.pk).delete()
+            if deleted:
+                _adjust_likes_count(instance.article_id, -1)
 
     @action(detail=False, methods=["delete"], url_path=r"by-article/(?P<article_id>\d+)")
     def by_article(self, request, article_id=None):
@@ -175,10 +427,106 @@ class PostUserLikesViewSet(
         DELETE /api/post-user-likes/by-article/<article_id>/
         Removes the current user's like for that article (idempotent).
         """
-        prof = _get_userprofile_for_request(request)
-        if prof is None:
+        profile_id = get_request_profile_id(request)
+        if profile_id is None:
             return Response({"detail": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        PostUserLikes.objects.filter(
-            user_id=prof.id, article_id=article_id).delete()
+        with transaction.atomic():
+            deleted, _ = PostUserLikes.objects.filter(
+                user_id=profile_id, article_id=article_id).delete()
+            if deleted:
+                _adjust_likes_count(article_id, -deleted)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["get"], url_path="liked-ids", pagination_class=None)
+    def liked_ids(self, request):
+        """
+        GET /api/post-user-likes/liked-ids/?articles=1,2,3
+        Article ids the current user liked, as a flat array (optionally
+        restricted to the given ids). Served from the (user, article) index
+        without touching article rows.
+        """
+        profile_id = get_request_profile_id(request)
+        if profile_id is None:
+            return Response([])
+        qs = PostUserLikes.objects.filter(user_id=profile_id)
+        articles = request.query_params.get("articles")
+        if articles:
+            try:
+                ids = [int(a) for a in articles.split(",") if a.strip()]
+            except ValueError:
+                raise ValidationError({"articles": ["Expected comma-separated ids."]})
+            qs = qs.filter(article_id__in=ids)
+        return Response(list(
+            qs.order_by("article_id").values_list("article_id", flat=True)))
+
+    @action(detail=False, methods=["post"], url_path="batch",
+            serializer_class=LikeBatchSerializer)
+    def batch(self, request):
+        """
+        POST /api/post-user-likes/batch/ { "like": [ids], "unlike": [ids] }
+        Likes and unlikes many articles at once: one bulk insert (existing
+        likes and unknown articles are skipped), one delete and one
+        likes_count refresh for the touched articles.
+        """
+        profile_id = get_request_profile_id(request)
+        if profile_id is None:
+            raise permissions.PermissionDenied("Authentication required")
+        ser = LikeBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        like_ids = set(ser.validated_data["like"])
+        unlike_ids = set(ser.validated_data["unlike"])
+
+        with transaction.atomic():
+            mine = PostUserLikes.objects.filter(user_id=profile_id)
+            already = set(mine.filter(article_id__in=like_ids | unlike_ids)
+                          .values_list("article_id", flat=True))
+            to_like = set(Article.objects.filter(
+                pk__in=like_ids - already).values_list("pk", flat=True))
+            PostUserLikes.objects.bulk_create(
+                [PostUserLikes(user_id=profile_id, article_id=a) for a in to_like],
+                ignore_conflicts=True,
+            )
+            to_unlike = unlike_ids & already
+            if to_unlike:
+                mine.filter(article_id__in=to_unlike).delete()
+            touched = to_like | to_unlike
+            if touched:
+                Article.objects.filter(pk__in=touched).refresh_likes_count()
+
+        if touched:
+            # bulk_create bypasses the post_save receivers in models.py
+            invalidate_row_count(PostUserLikes)
+            bump_content_version()
+        return Response({
+            "liked": sorted(to_like),
+            "unliked": sorted(to_unlike),
+        })
+
+
+class ExportView(APIView):
+    """
+    Staff-only streaming dumps for analytics jobs:
+      GET /api/export/articles/  (with likes_count, comments_count)
+      GET /api/export/comments/
+      GET /api/export/likes/
+    One JSON object per line, oldest first; ?since=<ISO date/datetime>
+    limits to rows created at or after that moment.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            raise NotFound(f"Unknown export {kind!r}")
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError as exc:
+                raise ValidationError({"since": [str(exc)]})
+        response = StreamingHttpResponse(
+            export_ndjson(kind, since or None),
+            content_type="application/x-ndjson",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{kind}.ndjson"'
+        return response
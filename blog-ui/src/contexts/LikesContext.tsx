@@ -3,7 +3,6 @@ import { apiFetch } from "../services/api";
 import ENDPOINTS from "../services/endpoints";
 import { useAuth } from "./AuthContext";
 
-type LikeRow = { id: number; article: number; user: number };
 type LikesMap = Record<number, true>;
 
 export type LikesContextValue = {
@@ -34,13 +33,12 @@ export const LikesProvider: React.FC<{ children: React.ReactNode }> = ({ childre
             setLikes({});
             return;
         }
-        const url = `${ENDPOINTS.postUserLikes}?mine=1`;
-        const rows = await apiFetch<LikeRow[]>(url, {
+        const ids = await apiFetch<number[]>(ENDPOINTS.postUserLikedIds, {
             headers: { Authorization: `Bearer ${token}` },
         });
         const map: LikesMap = {};
-        if (Array.isArray(rows)) {
-            for (const r of rows) map[r.article] = true;
+        if (Array.isArray(ids)) {
+            for (const id of ids) map[id] = true;
         }
         setLikes(map);
     }, [token]);
@@ -16,6 +16,8 @@ export const ENDPOINTS = {
 
     postUserLikes: `${API_BASE}/api/post-user-likes/`,
     postUserLikeDetail: (id: number) => `${API_BASE}/api/post-user-likes/${id}/`,
+    postUserLikedIds: `${API_BASE}/api/post-user-likes/liked-ids/`,
+    postUserLikesBatch: `${API_BASE}/api/post-user-likes/batch/`,
 
     // ✅ FIXED: add /api prefix here
     postUserLikesByArticle: (articleId: number) =>
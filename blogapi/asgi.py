@@ -13,4 +13,63 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogapi.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.core.handlers.exception import convert_exception_to_response  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+
+# Hooks BaseHandler would have to run through a thread hop per request.
+_SYNC_HOOKS = ("process_view", "process_template_response", "process_exception")
+
+
+class AsyncReadHandler(ASGIHandler):
+    """
+    ASGIHandler for the async read endpoints (articles.async_views) that
+    loads only settings.ASYNC_READ_MIDDLEWARE. Django runs each
+    MiddlewareMixin-style middleware through a thread hop per request
+    under ASGI, which would cost more than the async views save.
+    """
+
+    def __init__(self):
+        self.middleware = tuple(settings.ASYNC_READ_MIDDLEWARE)
+        super().__init__()
+
+    def load_middleware(self, is_async=True):
+        """
+        BaseHandler.load_middleware() over self.middleware rather than
+        settings.MIDDLEWARE. Every entry must be async-capable and define
+        none of the hooks in _SYNC_HOOKS, so the chain has no thread hops.
+        """
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = convert_exception_to_response(self._get_response_async)
+        for middleware_path in reversed(self.middleware):
+            middleware = import_string(middleware_path)
+            if not getattr(middleware, "async_capable", False):
+                raise ImproperlyConfigured(
+                    f"ASYNC_READ_MIDDLEWARE: {middleware_path} is not async-capable.")
+            try:
+                mw_instance = middleware(handler)
+            except MiddlewareNotUsed:
+                continue
+            if any(hasattr(mw_instance, hook) for hook in _SYNC_HOOKS):
+                raise ImproperlyConfigured(
+                    f"ASYNC_READ_MIDDLEWARE: {middleware_path} defines a "
+                    f"process_* hook, which would need a thread hop.")
+            handler = convert_exception_to_response(mw_instance)
+        self._middleware_chain = handler
+
+
+async_read_application = AsyncReadHandler()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"].startswith(
+            settings.ASYNC_READ_PATH_PREFIX):
+        return await async_read_application(scope, receive, send)
+    return await django_application(scope, receive, send)
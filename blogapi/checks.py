@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries are only visible to the process that wrote them.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The response-cache version, cached users and replica pins are
+    invalidated through the cache, so with several workers a process-local
+    backend leaves the other workers serving stale data.
+    """
+    if settings.DEBUG:
+        return []
+    aliases = {"default", settings.RESPONSE_CACHE_ALIAS, settings.AUTH_USER_CACHE_ALIAS}
+    return [
+        Warning(
+            f"Cache {alias!r} is process-local; invalidations will not reach "
+            "other worker processes.",
+            hint="Set CACHE_URL to a shared cache (e.g. redis://host:6379/0), "
+                 "or run a single worker process.",
+            id="blogapi.W001",
+        )
+        for alias in sorted(aliases)
+        if settings.CACHES.get(alias, {}).get("BACKEND") in PROCESS_LOCAL_CACHES
+    ]
@@ -0,0 +1,54 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_opened = Counter()
+_lock = threading.Lock()
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+def database_connection_stats():
+    """
+    Cumulative connection counters per database alias, for metrics:
+
+      connections_opened  connections Django set up in this process: one
+                          per request without pooling, only reconnects with
+                          persistent connections, one per checkout if pooled
+      mode                "pool", "persistent" or "per-request"
+
+    With DB_POOL on, the psycopg pool's counters are added: checkouts,
+    waits (checkouts that queued), wait_ms, timeouts, reconnects (pooled
+    connections found broken) and the current size/available.
+    """
+    stats = {}
+    for alias in connections:
+        wrapper = connections[alias]
+        with _lock:
+            entry = {"connections_opened": _opened[alias]}
+        pool = getattr(wrapper, "pool", None)
+        if pool is not None:
+            pool_stats = pool.get_stats()
+            entry.update(
+                mode="pool",
+                checkouts=pool_stats.get("requests_num", 0),
+                waits=pool_stats.get("requests_queued", 0),
+                wait_ms=pool_stats.get("requests_wait_ms", 0),
+                timeouts=pool_stats.get("requests_errors", 0),
+                reconnects=pool_stats.get("connections_lost", 0),
+                size=pool_stats.get("pool_size", 0),
+                available=pool_stats.get("pool_available", 0),
+            )
+        elif wrapper.settings_dict.get("CONN_MAX_AGE"):
+            entry["mode"] = "persistent"
+        else:
+            entry["mode"] = "per-request"
+        stats[alias] = entry
+    return stats
@@ -0,0 +1,131 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_CACHE_KEY = "db:primary-pin:{}"
+PIN_COOKIE = "primary_pin"
+PIN_COOKIE_SALT = "blogapi.db_routing.primary-pin"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Route ORM reads inside the block to a replica (see the router), or
+    with enabled=False back to the primary.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary_reads():
+    return replica_reads(enabled=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads go to a random settings.DATABASE_REPLICAS alias, but only inside
+    replica_reads() and outside transactions on the primary; everything
+    else, including all writes, uses the primary ("default").
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            not _replica_reads.get()
+            or not settings.DATABASE_REPLICAS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so rows may relate across aliases.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def pin_to_primary(request, response, user):
+    """
+    Serve `user`'s reads from the primary for REPLICA_PIN_SECONDS: a
+    signed cookie carries the pin back with the client's next requests,
+    whichever worker serves them; the shared cache covers clients that
+    drop cookies.
+    """
+    response.set_signed_cookie(
+        PIN_COOKIE, str(user.pk), salt=PIN_COOKIE_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax",
+        secure=request.is_secure())
+    cache.set(PIN_CACHE_KEY.format(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return False
+    pinned_id = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS)
+    return pinned_id == str(user.pk) or bool(
+        cache.get(PIN_CACHE_KEY.format(user.pk)))
+
+
+class PrimaryPinMiddleware:
+    """
+    After a successful write by an authenticated user, pin that user to the
+    primary so they read their own writes despite replication lag (see
+    pin_to_primary).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            # DRF copies the token-authenticated user onto the HttpRequest.
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(request, response, user)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin: safe-method requests read from a replica unless the
+    requesting user is pinned to the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = None
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and not is_pinned(request)
+        ):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,242 @@
+"""
+In-process request metrics in the Prometheus text format, at /metrics/.
+
+MetricsMiddleware records, per route name ("article-list",
+"post-user-likes-by-article", ...) and method:
+
+  - request latency and in-request DB time histograms,
+  - response size histogram (non-streaming responses),
+  - a counter per status code.
+
+It also exports the anonymous response cache hit/miss counters and the
+database connection stats (blogapi.db_metrics). Every worker process
+keeps its own numbers, so scrape each worker, or run one worker per
+scrape target. Requests to the lean ASGI read path (ASYNC_READ_PATH_PREFIX)
+bypass the middleware stack and are not recorded.
+
+The endpoint answers staff users (session or JWT) and
+"Authorization: Bearer <METRICS_TOKEN>".
+"""
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from articles.caching import response_cache_stats
+from users.auth import get_staff_user
+
+from .db_metrics import database_connection_stats
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+# Anything else is recorded as "other" to bound label cardinality.
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# (database_connection_stats() key, metric, type, help, scale)
+POOL_METRICS = (
+    ("checkouts", "blogapi_db_pool_checkouts_total", "counter",
+     "Connections handed out by the pool.", 1),
+    ("waits", "blogapi_db_pool_waits_total", "counter",
+     "Checkouts that had to wait.", 1),
+    ("wait_ms", "blogapi_db_pool_wait_seconds_total", "counter",
+     "Total checkout wait time.", 0.001),
+    ("timeouts", "blogapi_db_pool_timeouts_total", "counter",
+     "Checkouts that timed out or failed.", 1),
+    ("reconnects", "blogapi_db_pool_reconnects_total", "counter",
+     "Pooled connections found broken.", 1),
+    ("size", "blogapi_db_pool_size", "gauge", "Connections in the pool.", 1),
+    ("available", "blogapi_db_pool_available", "gauge",
+     "Idle connections in the pool.", 1),
+)
+
+_local = threading.local()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above every bound
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def copy(self):
+        other = Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.sum = self.sum
+        return other
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "db_time", "size", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = Counter()
+
+
+class Registry:
+    """Per-(route, method) metrics; one short lock per observation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, method, status, seconds, db_seconds, size):
+        key = (route, method)
+        with self._lock:
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = RouteMetrics()
+            metrics.latency.observe(seconds)
+            metrics.db_time.observe(db_seconds)
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.statuses[status] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (m.latency.copy(), m.db_time.copy(), m.size.copy(),
+                      dict(m.statuses))
+                for key, m in self._routes.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = Registry()
+
+
+def _time_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        _local.db_time = getattr(_local, "db_time", 0.0) + time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Installed once per connection instead of per request. Inserted first
+    # so execute_wrapper() blocks, which pop the last wrapper, stay balanced.
+    if settings.METRICS_ENABLED and _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.db_time = 0.0
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        registry.observe(
+            (match.url_name or "unnamed") if match else "unmatched",
+            request.method if request.method in METHODS else "other",
+            response.status_code,
+            elapsed,
+            _local.db_time,
+            None if response.streaming else len(response.content),
+        )
+        return response
+
+
+def metrics_view(request):
+    if not _authorized(request):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
+
+
+def _authorized(request):
+    token = settings.METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return True
+    return get_staff_user(request) is not None
+
+
+def render_metrics():
+    lines = []
+    snapshot = sorted(registry.snapshot().items())
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def histogram(name, index, help_text):
+        family(name, "histogram", help_text)
+        for (route, method), metrics in snapshot:
+            hist = metrics[index]
+            labels = f'route="{_escape(route)}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            total = cumulative + hist.counts[-1]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+            lines.append(f"{name}_count{{{labels}}} {total}")
+
+    family("blogapi_http_requests_total", "counter",
+           "Requests by route, method and status code.")
+    for (route, method), (*_, statuses) in snapshot:
+        for status, count in sorted(statuses.items()):
+            lines.append(
+                f'blogapi_http_requests_total{{route="{_escape(route)}",'
+                f'method="{method}",status="{status}"}} {count}')
+    histogram("blogapi_http_request_duration_seconds", 0,
+              "Request latency, middleware included.")
+    histogram("blogapi_http_request_db_seconds", 1,
+              "Time spent in SQL per request.")
+    histogram("blogapi_http_response_size_bytes", 2,
+              "Response body size (streaming responses excluded).")
+
+    cache_stats = response_cache_stats()
+    family("blogapi_response_cache_requests_total", "counter",
+           "Anonymous response cache lookups by outcome.")
+    for outcome, key in (("hit", "hits"), ("miss", "misses")):
+        lines.append(
+            f'blogapi_response_cache_requests_total{{outcome="{outcome}"}} '
+            f"{cache_stats[key]}")
+
+    db_stats = database_connection_stats()
+    family("blogapi_db_connections_opened_total", "counter",
+           "Database connections set up by this process.")
+    for alias, stats in db_stats.items():
+        lines.append(
+            f'blogapi_db_connections_opened_total{{alias="{alias}"}} '
+            f"{stats['connections_opened']}")
+    pooled = {alias: s for alias, s in db_stats.items() if s["mode"] == "pool"}
+    if pooled:
+        for key, name, kind, help_text, scale in POOL_METRICS:
+            family(name, kind, help_text)
+            for alias, stats in pooled.items():
+                lines.append(f'{name}{{alias="{alias}"}} {stats[key] * scale}')
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
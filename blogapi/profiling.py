@@ -0,0 +1,221 @@
+"""
+On-demand request profiling.
+
+With PROFILING_ENABLED on, ProfilingMiddleware runs a request under
+cProfile when:
+
+  - a staff user sends "X-Profile: 1" or ?_profile=1, or
+  - the request falls in the random PROFILING_SAMPLE_RATE fraction.
+
+Each profile keeps the top functions by cumulative time and a timeline of
+the SQL statements, and the raw cProfile stats are kept alongside for
+snakeviz/pstats. Profiles are stored in PROFILING_DIR, a ring buffer of
+the newest PROFILING_MAX_ENTRIES. Profiled responses carry X-Profile-Id.
+
+Staff read them at:
+  GET /api/debug/profiles/                    newest first (summaries)
+  GET /api/debug/profiles/<id>/               full record
+  GET /api/debug/profiles/<id>/download/      raw .prof file
+
+With PROFILING_ENABLED off the middleware is not installed at all.
+"""
+import cProfile
+import json
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.auth import get_staff_user
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "_profile"
+TOP_FUNCTIONS = 40
+MAX_SQL_STATEMENTS = 500
+MAX_SQL_LENGTH = 500
+PROFILE_ID_RE = re.compile(r"^\d{19,20}-[0-9a-f]{8}$")
+
+
+class SQLTimeline:
+    """execute_wrapper recording each statement's start offset and duration."""
+
+    def __init__(self, started):
+        self.started = started
+        self.statements = []
+        self.dropped = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.statements) < MAX_SQL_STATEMENTS:
+                self.statements.append({
+                    "alias": context["connection"].alias,
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "sql": sql[:MAX_SQL_LENGTH],
+                })
+            else:
+                self.dropped += 1
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate = settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        trigger = None
+        if self._requested(request) and get_staff_user(request) is not None:
+            trigger = "staff"
+        elif self.rate > 0 and random.random() < self.rate:
+            trigger = "sample"
+        if trigger is None:
+            return self.get_response(request)
+        return self._profile(request, trigger)
+
+    @staticmethod
+    def _requested(request):
+        return (request.META.get(PROFILE_HEADER) == "1"
+                or request.GET.get(PROFILE_PARAM) == "1")
+
+    def _profile(self, request, trigger):
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(timeline))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - started
+
+        match = request.resolver_match
+        record = {
+            "trigger": trigger,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "route": match.url_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 3),
+            "sql_ms": round(sum(s["duration_ms"] for s in timeline.statements), 3),
+            "sql_count": len(timeline.statements) + timeline.dropped,
+            "top_functions": top_functions(profiler),
+            "sql": timeline.statements,
+        }
+        response["X-Profile-Id"] = save_profile(record, profiler)
+        return response
+
+
+def top_functions(profiler, limit=TOP_FUNCTIONS):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{filename}:{line}({name})",
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _)
+        in rows[:limit]
+    ]
+
+
+def _profile_dir():
+    path = Path(settings.PROFILING_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_profile(record, profiler):
+    """Store a profile, drop the oldest beyond the limit; returns its id."""
+    directory = _profile_dir()
+    # Zero-padded timestamps sort chronologically by name.
+    profile_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    record = {"id": profile_id, "created": time.time(), **record}
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    tmp = directory / f"{profile_id}.json.tmp"
+    tmp.write_text(json.dumps(record), encoding="utf-8")
+    tmp.replace(directory / f"{profile_id}.json")
+
+    for stale in sorted(directory.glob("*.json"))[:-settings.PROFILING_MAX_ENTRIES]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix(".prof").unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles():
+    """Summaries of the stored profiles, newest first."""
+    summaries = []
+    for path in sorted(_profile_dir().glob("*.json"), reverse=True):
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue  # pruned by another process meanwhile
+        summaries.append({
+            key: record[key] for key in (
+                "id", "created", "trigger", "method", "path", "route",
+                "status", "total_ms", "sql_ms", "sql_count")
+        })
+    return summaries
+
+
+def _profile_path(profile_id, suffix):
+    if not PROFILE_ID_RE.match(profile_id):
+        raise NotFound("No such profile.")
+    path = _profile_dir() / f"{profile_id}{suffix}"
+    if not path.exists():
+        raise NotFound("No such profile.")
+    return path
+
+
+class ProfileListView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(operation_id="debug_profiles_list",
+                   responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(operation_id="debug_profiles_retrieve",
+                   responses={200: OpenApiTypes.OBJECT})
+    def get(self, request, profile_id):
+        path = _profile_path(profile_id, ".json")
+        return Response(json.loads(path.read_text(encoding="utf-8")))
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(operation_id="debug_profiles_download",
+                   responses={(200, "application/octet-stream"): OpenApiTypes.BINARY})
+    def get(self, request, profile_id):
+        path = _profile_path(profile_id, ".prof")
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename=path.name,
+            content_type="application/octet-stream")
@@ -1,6 +1,8 @@
+import tempfile
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     "django_filters",
@@ -32,16 +35,27 @@ INSTALLED_APPS = [
 
 # ===== Middleware =====
 MIDDLEWARE = [
+    "blogapi.metrics.MetricsMiddleware",
+    "blogapi.sql_instrumentation.SQLInstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "blogapi.db_routing.PrimaryPinMiddleware",
+    "blogapi.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Under ASGI, requests to ASYNC_READ_PATH_PREFIX (articles.async_views) only
+# go through these; keep them async-native (see blogapi/asgi.py).
+ASYNC_READ_PATH_PREFIX = "/api/async/"
+ASYNC_READ_MIDDLEWARE = [
+    "corsheaders.middleware.CorsMiddleware",
+]
+
 ROOT_URLCONF = "blogapi.urls"
 
 TEMPLATES = [
@@ -62,6 +76,19 @@ TEMPLATES = [
 WSGI_APPLICATION = "blogapi.wsgi.application"
 
 # Database
+# DB_POOL=True swaps persistent connections for psycopg 3's connection pool
+# (requires `pip install -r requirements-pool.txt`); blogapi.db_metrics
+# reports its checkout/wait/reconnect counters.
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+if DB_POOL:
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "DB_POOL=True needs psycopg 3 and psycopg_pool; "
+            "install them with `pip install -r requirements-pool.txt`."
+        ) from exc
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -70,9 +97,38 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD"),
         "HOST": config("DB_HOST", default="127.0.0.1"),
         "PORT": config("DB_PORT", default="5432"),
+        # Persistent connections, checked for liveness before each reuse.
+        "CONN_MAX_AGE": 0 if DB_POOL else config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        "OPTIONS": {
+            "pool": {
+                "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+                "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+                "timeout": config("DB_POOL_TIMEOUT", default=10.0, cast=float),
+            },
+        } if DB_POOL else {},
     }
 }
 
+# Read replicas: DB_REPLICAS=host[:port][/name],... (port and name default
+# to the primary's). Safe requests to views using
+# blogapi.db_routing.ReplicaReadMixin read from them; a user who just wrote
+# reads from the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+for _i, _entry in enumerate(config("DB_REPLICAS", default="", cast=Csv()), start=1):
+    _address, _, _name = _entry.partition("/")
+    _host, _, _port = _address.partition(":")
+    DATABASES[f"replica_{_i}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "NAME": _name or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{_i}")
+DATABASE_ROUTERS = ["blogapi.db_routing.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=10, cast=int)
+
 # ===== Password validation =====
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -97,6 +153,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # === DRF / JWT / Filters ===
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
+    "TOKEN_OBTAIN_SERIALIZER": "users.auth.ProfileTokenObtainPairSerializer",
 }
 
 REST_FRAMEWORK = {
@@ -105,7 +162,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.auth.CachedJWTAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -124,6 +181,67 @@ REST_FRAMEWORK = {
     },
 }
 
+# ===== Cache =====
+# Must be shared by all worker processes: the response cache's content
+# version, cached users and replica pins are invalidated through it.
+# CACHE_URL=redis://host:6379/0 uses Redis;
+# unset, each process gets its own LocMemCache, which is only correct with
+# a single worker (blogapi.checks warns about it outside DEBUG).
+CACHE_URL = config("CACHE_URL", default="")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_URL,
+        "KEY_PREFIX": config("CACHE_KEY_PREFIX", default="blogapi"),
+    } if CACHE_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Anonymous article/comment read cache (articles.caching)
+RESPONSE_CACHE_ALIAS = config("RESPONSE_CACHE_ALIAS", default="default")
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+
+# JWT user resolution (users.auth.CachedJWTAuthentication)
+AUTH_USER_CACHE_ALIAS = config("AUTH_USER_CACHE_ALIAS", default="default")
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=300, cast=int)
+AUTH_USER_LOCAL_CACHE_SIZE = config("AUTH_USER_LOCAL_CACHE_SIZE", default=1024, cast=int)
+AUTH_USER_LOCAL_CACHE_TTL = config("AUTH_USER_LOCAL_CACHE_TTL", default=10.0, cast=float)
+JWT_STATELESS_READS = config("JWT_STATELESS_READS", default=False, cast=bool)
+
+# Per-request SQL instrumentation (blogapi.sql_instrumentation): fraction
+# of requests measured (0 removes the middleware); statements repeated this
+# often in one request are flagged as duplicates.
+SQL_INSTRUMENTATION_SAMPLE_RATE = config(
+    "SQL_INSTRUMENTATION_SAMPLE_RATE", default=0.0, cast=float)
+SQL_DUPLICATE_THRESHOLD = config("SQL_DUPLICATE_THRESHOLD", default=3, cast=int)
+
+# In-process request metrics (blogapi.metrics) at /metrics/, readable by
+# staff users or with "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# cProfile runs of single requests (blogapi.profiling): triggered by staff
+# with "X-Profile: 1" or ?_profile=1, or for a random PROFILING_SAMPLE_RATE
+# fraction; the newest PROFILING_MAX_ENTRIES are kept in PROFILING_DIR.
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0.0, cast=float)
+PROFILING_DIR = config(
+    "PROFILING_DIR", default=str(Path(tempfile.gettempdir()) / "blogapi-profiles"))
+PROFILING_MAX_ENTRIES = config("PROFILING_MAX_ENTRIES", default=50, cast=int)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "blogapi.sql": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# PostgreSQL text search configuration for Article.search_vector
+ARTICLE_SEARCH_CONFIG = config("ARTICLE_SEARCH_CONFIG", default="english")
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Blog API",
     "DESCRIPTION": "Articles & Comments API with JWT, search, ordering and nested comments path.",
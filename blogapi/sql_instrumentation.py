@@ -0,0 +1,127 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("blogapi.sql")
+
+# Longest SQL text put in a log line.
+MAX_LOGGED_SQL = 500
+
+
+class QueryRecorder:
+    """execute_wrapper that times every statement of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, None)
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+            # `sql` is the parametrized template, so repeats of one
+            # statement with different ids (N+1 loops) share a key.
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """[(sql, times)] for statements run at least `threshold` times."""
+        return [(sql, n) for sql, n in self.statements.most_common()
+                if n >= threshold]
+
+
+class SQLInstrumentationMiddleware:
+    """
+    For a sampled fraction (SQL_INSTRUMENTATION_SAMPLE_RATE) of requests,
+    records query count, total and slowest query time, and statements
+    repeated SQL_DUPLICATE_THRESHOLD or more times (likely N+1 loops).
+
+    They are reported in a Server-Timing header (durations and counts
+    only, never SQL text) and a JSON log line on the "blogapi.sql" logger,
+    tagged with the route name ("article-list"), view class and action.
+    With a rate of 0 Django drops the middleware entirely; unsampled
+    requests pay for one random() call.
+
+    Queries run while a streaming response is consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        if self.rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.rate < 1 and random.random() >= self.rate:
+            return self.get_response(request)
+
+        recorder = request._sql_recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        duplicates = recorder.duplicates(settings.SQL_DUPLICATE_THRESHOLD)
+        response["Server-Timing"] = _server_timing(recorder, duplicates, total)
+        slowest_time, slowest_sql = recorder.slowest
+        match = request.resolver_match
+        logger.info(json.dumps({
+            "route": match.url_name if match else None,
+            **getattr(request, "_sql_view", {}),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(recorder.duration * 1000, 2),
+            "queries": recorder.count,
+            "slowest_ms": round(slowest_time * 1000, 2),
+            "slowest_sql": (slowest_sql or "")[:MAX_LOGGED_SQL] or None,
+            "duplicates": [
+                {"sql": sql[:MAX_LOGGED_SQL], "times": n}
+                for sql, n in duplicates
+            ],
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "_sql_recorder"):
+            request._sql_view = view_tags(request, view_func)
+
+
+def view_tags(request, view_func):
+    """{"view": class or function name, "action": viewset action or None}."""
+    cls = getattr(view_func, "cls", None)
+    actions = getattr(view_func, "actions", None) or {}
+    return {
+        "view": cls.__name__ if cls else getattr(view_func, "__name__", None),
+        "action": actions.get(request.method.lower()),
+    }
+
+
+def _server_timing(recorder, duplicates, total):
+    metrics = [
+        f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+        f"db-slowest;dur={recorder.slowest[0] * 1000:.2f}",
+        f"total;dur={total * 1000:.2f}",
+    ]
+    if duplicates:
+        metrics.append(
+            f'db-duplicates;desc="{len(duplicates)} repeated statement(s), '
+            f'max {duplicates[0][1]}x"')
+    return ", ".join(metrics)
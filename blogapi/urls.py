@@ -7,7 +7,12 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
     SpectacularRedocView,
 )
-from articles.views import ArticleViewSet, CommentViewSet, PostUserLikesViewSet
+from articles.async_views import article_detail, article_list, comment_list
+from blogapi.metrics import metrics_view
+from blogapi.profiling import ProfileDetailView, ProfileDownloadView, ProfileListView
+from articles.views import (
+    ArticleViewSet, CommentViewSet, ExportView, PostUserLikesViewSet, TagViewSet,
+)
 from users.views import AuthViewSet, UserProfileViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -16,12 +21,25 @@ router.register(r"articles", ArticleViewSet, basename="article")
 router.register(r"comments", CommentViewSet, basename="comment")
 router.register(r"post-user-likes", PostUserLikesViewSet,
                 basename="post-user-likes")
+router.register(r"tags", TagViewSet, basename="tag")
 router.register(r"auth", AuthViewSet, basename="auth")
 router.register(r"user-profiles", UserProfileViewSet, basename="userprofile")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include(router.urls)),
+    path("api/async/articles/", article_list, name="async-article-list"),
+    path("api/async/articles/<int:pk>/", article_detail,
+         name="async-article-detail"),
+    path("api/async/comments/", comment_list, name="async-comment-list"),
+    path("api/export/<slug:kind>/", ExportView.as_view(), name="export"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("api/debug/profiles/", ProfileListView.as_view(),
+         name="debug-profile-list"),
+    path("api/debug/profiles/<str:profile_id>/", ProfileDetailView.as_view(),
+         name="debug-profile-detail"),
+    path("api/debug/profiles/<str:profile_id>/download/",
+         ProfileDownloadView.as_view(), name="debug-profile-download"),
 
     # JWT
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
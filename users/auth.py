@@ -0,0 +1,253 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from blogapi.lru import LRUCache
+
+from .models import UserProfile
+
+PROFILE_ID_CLAIM = "profile_id"
+USER_CACHE_KEY = "users:auth:{}"
+
+# Field values (not instances) are cached so each request gets its own User.
+_local_users = LRUCache(
+    maxsize=settings.AUTH_USER_LOCAL_CACHE_SIZE,
+    ttl=settings.AUTH_USER_LOCAL_CACHE_TTL,
+)
+
+
+def _shared_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def _user_fields(user):
+    return {f.attname: getattr(user, f.attname) for f in User._meta.concrete_fields}
+
+
+def get_cached_user(user_id):
+    """
+    User with pk `user_id`, read through a per-process TTL LRU and the
+    shared cache before the database. Returns None if no such user.
+    """
+    user_id = str(user_id)  # the token claim is a string
+    fields = _local_users.get(user_id)
+    if fields is None:
+        key = USER_CACHE_KEY.format(user_id)
+        fields = _shared_cache().get(key)
+        if fields is None:
+            user = User.objects.filter(pk=user_id).first()
+            if user is None:
+                return None
+            fields = _user_fields(user)
+            _shared_cache().set(key, fields, settings.AUTH_USER_CACHE_TIMEOUT)
+        _local_users.set(user_id, fields)
+    return _user_from_fields(fields)
+
+
+async def aget_cached_user(user_id):
+    """Async get_cached_user(); LRU hits do not leave the event loop."""
+    user_id = str(user_id)
+    fields = _local_users.get(user_id)
+    if fields is None:
+        key = USER_CACHE_KEY.format(user_id)
+        fields = await _shared_cache().aget(key)
+        if fields is None:
+            user = await User.objects.filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            fields = _user_fields(user)
+            await _shared_cache().aset(
+                key, fields, settings.AUTH_USER_CACHE_TIMEOUT)
+        _local_users.set(user_id, fields)
+    return _user_from_fields(fields)
+
+
+def _user_from_fields(fields):
+    return User.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+
+
+def forget_cached_user(user_id):
+    """
+    Drop a user from the shared cache (CACHE_URL) and this process's LRU.
+    Other processes' LRU entries expire within AUTH_USER_LOCAL_CACHE_TTL.
+    """
+    user_id = str(user_id)
+    _local_users.delete(user_id)
+    _shared_cache().delete(USER_CACHE_KEY.format(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    # Covers deactivation and set_password(), which both end in save().
+    # Dropped after commit: before it, a concurrent request could re-cache
+    # the old row.
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_cached_user(user_id), using=using)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through
+    get_cached_user() instead of querying the user table per request.
+
+    With JWT_STATELESS_READS on, safe-method requests to view actions
+    listed in the view's `stateless_auth_actions` get a TokenUser built
+    from the claims alone (no user lookup at all); such actions must only
+    need the user's id, not its flags.
+    """
+
+    stateless = False
+
+    def authenticate(self, request):
+        self.stateless = (
+            settings.JWT_STATELESS_READS
+            and request.method in SAFE_METHODS
+            and _view_action(request) in getattr(
+                _view(request), "stateless_auth_actions", ())
+        )
+        return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for plain Django async views: takes an HttpRequest,
+        returns (user, validated_token) or None. Set `stateless` first to
+        skip the user lookup.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        if self.stateless:
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        return self._check_user(get_cached_user(user_id), validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        if self.stateless:
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        return self._check_user(
+            await aget_cached_user(user_id), validated_token)
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+    def _check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+def get_staff_user(request):
+    """
+    Staff user behind a plain Django request (session, or a JWT in the
+    Authorization header), else None. For endpoints outside DRF views.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = CachedJWTAuthentication().authenticate(Request(request))
+        except APIException:
+            return None
+        user = result[0] if result else None
+    return user if user is not None and user.is_staff else None
+
+
+def _view(request):
+    return (getattr(request, "parser_context", None) or {}).get("view")
+
+
+def _view_action(request):
+    return getattr(_view(request), "action", None)
+
+
+class ProfileTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair whose claims carry the caller's UserProfile id, so views can
+    scope likes and viewer state without looking the profile up per request.
+    Refreshed access tokens inherit the claim from the refresh token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        token[PROFILE_ID_CLAIM] = profile.id
+        return token
+
+
+def get_request_profile_id(request):
+    """
+    UserProfile id of the authenticated caller, or None for anonymous
+    requests. Read from the access-token claim when present; tokens issued
+    before the claim existed (and non-JWT auth) fall back to one query,
+    memoized on the request.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    if not hasattr(request, "_profile_id"):
+        profile_id = _claimed_profile_id(request)
+        if profile_id is None:
+            profile_id = _profile_ids(user).first()
+        request._profile_id = profile_id
+    return request._profile_id
+
+
+async def aget_request_profile_id(request):
+    """Async get_request_profile_id() for plain Django async views."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    if not hasattr(request, "_profile_id"):
+        profile_id = _claimed_profile_id(request)
+        if profile_id is None:
+            profile_id = await _profile_ids(user).afirst()
+        request._profile_id = profile_id
+    return request._profile_id
+
+
+def _claimed_profile_id(request):
+    token = getattr(request, "auth", None)
+    return token.get(PROFILE_ID_CLAIM) if isinstance(token, Token) else None
+
+
+def _profile_ids(user):
+    return UserProfile.objects.filter(user_id=user.pk).values_list("id", flat=True)
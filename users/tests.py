@@ -1,6 +1,15 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from articles.models import Article, PostUserLikes
+from users.auth import USER_CACHE_KEY, ProfileTokenObtainPairSerializer, _local_users
+from users.models import UserProfile
 
 
 class AuthFlowTests(APITestCase):
@@ -48,3 +57,115 @@ class AuthFlowTests(APITestCase):
             "/api/auth/me/", {"first_name": "Itai"}, format="json")
         self.assertEqual(res2.status_code, 200, res2.content)
         self.assertEqual(res2.data["first_name"], "Itai")
+
+
+class ProfileClaimTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="claims", password="Aa123456!")
+        self.profile = UserProfile.objects.get(user=self.user)
+        self.article = Article.objects.create(
+            author=self.user, title="Claims", content="x")
+
+    def _login(self):
+        res = self.client.post(
+            "/token/", {"username": "claims", "password": "Aa123456!"}, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.data
+
+    def _profile_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            res = getattr(self.client, method)(path, data, format="json")
+        self.assertLess(res.status_code, 400, res.content)
+        return [q["sql"] for q in ctx.captured_queries if "users_userprofile" in q["sql"]]
+
+    def test_tokens_carry_profile_id(self):
+        tokens = self._login()
+        self.assertEqual(AccessToken(tokens["access"])["profile_id"], self.profile.id)
+        res = self.client.post("/token/refresh/", {"refresh": tokens["refresh"]}, format="json")
+        self.assertEqual(AccessToken(res.data["access"])["profile_id"], self.profile.id)
+
+    def test_hot_paths_skip_profile_lookup(self):
+        access = self._login()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self._profile_queries("get", "/api/articles/"), [])
+        self.assertEqual(self._profile_queries(
+            "post", "/api/post-user-likes/", {"article": self.article.id}), [])
+        self.assertEqual(self._profile_queries(
+            "delete", f"/api/post-user-likes/by-article/{self.article.id}/"), [])
+        self.assertEqual(self._profile_queries("get", "/api/auth/me/"), [])
+
+        res = self.client.get("/api/auth/me/")
+        self.assertEqual(res.data["profile"], {"id": self.profile.id, "user_id": self.user.id})
+
+    def test_tokens_without_claim_fall_back(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(len(self._profile_queries(
+            "post", "/api/post-user-likes/", {"article": self.article.id})), 1)
+        self.assertTrue(PostUserLikes.objects.filter(
+            user=self.profile, article=self.article).exists())
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        _local_users.clear()
+        self.user = User.objects.create_user(username="cached", password="Aa123456!")
+        access = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def _user_queries(self, method="get", path="/api/articles/", data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            res = getattr(self.client, method)(path, data, format="json")
+        return res, [q for q in ctx.captured_queries if '"auth_user"' in q["sql"]]
+
+    def test_user_is_resolved_from_cache_after_first_request(self):
+        res, queries = self._user_queries()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        res, queries = self._user_queries()
+        self.assertEqual(queries, [])
+
+        # The shared tier still answers when this process's LRU is cold.
+        _local_users.clear()
+        res, queries = self._user_queries()
+        self.assertEqual(queries, [])
+
+    def test_deactivation_and_updates_invalidate(self):
+        self._user_queries()
+        self.user.first_name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        res = self.client.get("/api/auth/me/")
+        self.assertEqual(res.data["user"]["first_name"], "Renamed")
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        res, _ = self._user_queries()
+        self.assertEqual(res.status_code, 401)
+
+    def test_password_change_invalidates(self):
+        self._user_queries()
+        self.user.set_password("Bb654321!")
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.save()
+        # still cached until the change commits
+        self.assertIsNotNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        self.assertIsNone(_local_users.get(str(self.user.pk)))
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads_skip_user_lookup(self):
+        res, queries = self._user_queries()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(queries, [])
+        self.assertIsNone(_local_users.get(str(self.user.pk)))
+
+        # Writes still load the real user.
+        res, queries = self._user_queries(
+            "post", "/api/articles/", {"title": "T", "content": "C"})
+        self.assertEqual(res.status_code, 201, res.content)
+        self.assertEqual(len(queries), 1)
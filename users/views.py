@@ -3,6 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from django.contrib.auth.models import User
+from blogapi.db_routing import ReplicaReadMixin
+from users.auth import get_request_profile_id
 from users.models import UserProfile
 from .serializers import UserSerializer, UserProfileSerializer
 from rest_framework import serializers as drf_serializers
@@ -45,10 +47,12 @@ class AuthViewSet(viewsets.ViewSet):
     def me(self, request):
         user = request.user
         if request.method.lower() == "get":
-            profile, _ = UserProfile.objects.get_or_create(user=user)
+            profile_id = get_request_profile_id(request)
+            if profile_id is None:
+                profile_id = UserProfile.objects.get_or_create(user=user)[0].id
             return Response({
                 "user": UserSerializer(user).data,
-                "profile": UserProfileSerializer(profile).data
+                "profile": {"id": profile_id, "user_id": user.id},
             })
         ser = UserSerializer(user, data=request.data, partial=True)
         ser.is_valid(raise_exception=True)
@@ -56,7 +60,7 @@ class AuthViewSet(viewsets.ViewSet):
         return Response(ser.data, status=status.HTTP_200_OK)
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = UserProfile.objects.select_related("user").all()
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]